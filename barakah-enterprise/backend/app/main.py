@@ -3,23 +3,31 @@ BarakahTool Enterprise - FastAPI Backend
 Modern Islamic Digital Platform with Professional PDF Generation
 """
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
+from decouple import config
+import asyncio
 import openai
 import stripe
-import redis
 import io
 import os
+import json
 from datetime import datetime
 import uuid
 
 # Import our enterprise services
-from services.dua_service import DuaService
+from services.dua_service import DuaService, dua_from_cache
 from services.payment_service import PaymentService
-from pdf.enterprise_pdf_generator import EnterprisePDFGenerator
+from services.cache_service import CacheService
+from services.single_flight import SingleFlight
+from services.file_response import serve_file
+from pdf.render_pool import PDFRenderPool
+from pdf.job_queue import PDFJobQueue, TERMINAL_STATES
+from pdf.pdf_store import PDFStore, dua_render_inputs, collection_render_inputs
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -42,10 +50,13 @@ app.add_middleware(
 # Initialize services
 dua_service = DuaService()
 payment_service = PaymentService()
-pdf_generator = EnterprisePDFGenerator()
+render_pool = PDFRenderPool()
+pdf_store = PDFStore()
+pdf_jobs = PDFJobQueue(render_pool, on_done=lambda job: pdf_store.register(job['id']))
 
-# Redis for caching
-redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+# Async Redis cache (connection pool configured from REDIS_URL)
+cache_service = CacheService()
+single_flight = SingleFlight(cache_service)
 
 # Pydantic models
 class DuaRequest(BaseModel):
@@ -54,6 +65,15 @@ class DuaRequest(BaseModel):
     premium_features: bool = False
     user_id: Optional[str] = None
 
+class BatchDuaItem(BaseModel):
+    situation: str
+    language: str = "English"
+
+class BatchDuaRequest(BaseModel):
+    items: List[BatchDuaItem]
+    premium_features: bool = False
+    combined_pdf: bool = False
+
 class PaymentRequest(BaseModel):
     plan: str  # "premium", "enterprise", "whitelabel"
     user_email: str
@@ -68,6 +88,47 @@ class DuaResponse(BaseModel):
     situation: str
     created_at: datetime
     pdf_url: Optional[str] = None
+    # Premium extras parsed from the completion, when present
+    quranic_reference: Optional[str] = None
+    timing: Optional[str] = None
+    context: Optional[str] = None
+    variations: Optional[str] = None
+
+    @classmethod
+    def from_dua(cls, dua_id: str, dua_data: dict, situation: str, language: str) -> "DuaResponse":
+        return cls(
+            id=dua_id,
+            arabic_text=dua_data['arabic'],
+            transliteration=dua_data.get('transliteration'),
+            translation=dua_data['translation'],
+            language=language,
+            situation=situation,
+            created_at=datetime.now(),
+            quranic_reference=dua_data.get('quranic_reference'),
+            timing=dua_data.get('timing'),
+            context=dua_data.get('context'),
+            variations=dua_data.get('variations')
+        )
+
+    def cache_entry(self) -> dict:
+        """This response as cached under its dua cache key, shared by every endpoint"""
+        entry = self.dict()
+        entry.pop('id')  # Remove unique ID from cache
+        return entry
+
+@app.on_event("startup")
+async def startup_event():
+    render_pool.start()
+    await pdf_jobs.start()
+    await pdf_store.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await pdf_jobs.stop()
+    await pdf_store.stop()
+    await cache_service.close()
+    await dua_service.client.close()
+    render_pool.shutdown()
 
 # Health check
 @app.get("/health")
@@ -81,10 +142,7 @@ async def health_check():
 
 # Generate Dua - Core Feature
 @app.post("/api/dua/generate", response_model=DuaResponse)
-async def generate_dua(
-    request: DuaRequest,
-    background_tasks: BackgroundTasks
-):
+async def generate_dua(request: DuaRequest):
     """
     Generate authentic Islamic dua with professional PDF
     """
@@ -93,86 +151,351 @@ async def generate_dua(
         dua_id = str(uuid.uuid4())
         
         # Check cache first
-        cache_key = f"dua:{hash(request.situation + request.language)}"
-        cached_result = redis_client.get(cache_key)
+        cache_key = dua_service.cache_key(request.situation, request.language)
+        cached_data = None
+        if not request.premium_features:
+            cached_data = await cache_service.get_json(cache_key)
         
-        if cached_result and not request.premium_features:
-            # Return cached result for basic requests
-            import json
-            cached_data = json.loads(cached_result)
+        if cached_data:
+            # Return cached result for basic requests; its PDF is already stored
             cached_data['id'] = dua_id
-            return DuaResponse(**cached_data)
+            response = DuaResponse(**cached_data)
+            await enqueue_pdf(dua_id, cached_pdf_data(response), response.situation)
+            return response
         
-        # Generate new dua using AI
-        dua_data = await dua_service.generate_dua(
-            situation=request.situation,
-            language=request.language,
-            premium=request.premium_features
+        # Generate new dua using AI, sharing one call among identical concurrent requests
+        flight_key = f"{cache_key}:{'premium' if request.premium_features else 'basic'}"
+        dua_data = await single_flight.run(
+            flight_key,
+            lambda: dua_service.generate_dua(
+                situation=request.situation,
+                language=request.language,
+                premium=request.premium_features
+            ),
+            share=lambda result: result.get('source') != 'fallback'
         )
         
         # Create response
-        response = DuaResponse(
-            id=dua_id,
-            arabic_text=dua_data['arabic'],
-            transliteration=dua_data.get('transliteration'),
-            translation=dua_data['translation'],
-            language=request.language,
-            situation=request.situation,
-            created_at=datetime.now()
-        )
+        response = DuaResponse.from_dua(dua_id, dua_data, request.situation, request.language)
         
-        # Generate PDF in background
-        background_tasks.add_task(
-            generate_pdf_background,
-            dua_id,
-            dua_data,
-            request.situation
-        )
+        # Queue the PDF render
+        await enqueue_pdf(dua_id, dua_data, request.situation)
         
-        # Cache the result
-        if not request.premium_features:
-            import json
-            cache_data = response.dict()
-            cache_data.pop('id')  # Remove unique ID from cache
-            redis_client.setex(cache_key, 3600, json.dumps(cache_data, default=str))
+        # Cache the result (never a fallback, or it would outlive an OpenAI outage)
+        if not request.premium_features and dua_data.get('source') != 'fallback':
+            await cache_service.set_json(cache_key, response.cache_entry(), ttl=3600)
         
         return response
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Dua generation failed: {str(e)}")
 
-# Download PDF
-@app.get("/api/dua/{dua_id}/pdf")
-async def download_pdf(dua_id: str):
+# Batch limits for enterprise API customers
+BATCH_MAX_ITEMS = config('BATCH_MAX_ITEMS', default=500, cast=int)
+BATCH_CONCURRENCY = config('BATCH_CONCURRENCY', default=8, cast=int)
+
+async def require_api_access(x_api_key: Optional[str] = Header(None)):
     """
-    Download professional PDF for generated dua
+    Restrict an endpoint to enterprise/whitelabel API keys
     """
-    try:
-        # Check if PDF exists
-        pdf_path = f"pdfs/{dua_id}.pdf"
+    if not await payment_service.has_api_access(x_api_key):
+        raise HTTPException(status_code=403, detail="Enterprise API access required")
+    return x_api_key
+
+# Generate Duas in bulk - Enterprise API
+@app.post("/api/dua/batch")
+async def generate_dua_batch(
+    request: BatchDuaRequest,
+    api_key: str = Depends(require_api_access)
+):
+    """
+    Generate many duas in one request. Identical situation/language pairs are
+    generated once, cached duas are served first, misses run with bounded
+    concurrency, and results stream back as newline-delimited JSON in the
+    order they complete. An item whose generation fails gets an error line;
+    the rest of the batch still streams.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one item")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {BATCH_MAX_ITEMS} items")
+    
+    batch_id = str(uuid.uuid4())
+    premium = request.premium_features
+    
+    # Dedupe: cache key -> every position in the batch that asked for it
+    positions: Dict[str, List[int]] = {}
+    for index, item in enumerate(request.items):
+        positions.setdefault(dua_service.cache_key(item.situation, item.language), []).append(index)
+    unique_keys = list(positions)
+    
+    # One pipelined round-trip for all cache lookups
+    cached = {}
+    if not premium:
+        cached = dict(zip(unique_keys, await cache_service.get_many(unique_keys)))
+    misses = [key for key in unique_keys if not cached.get(key)]
+    
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def generate(key: str):
+        """(key, dua_data, error): a failure is reported for its own items only"""
+        item = request.items[positions[key][0]]
+        try:
+            async with semaphore:
+                dua_data = await single_flight.run(
+                    f"{key}:{'premium' if premium else 'basic'}",
+                    lambda: dua_service.generate_dua(
+                        situation=item.situation,
+                        language=item.language,
+                        premium=premium
+                    ),
+                    share=lambda result: result.get('source') != 'fallback'
+                )
+        except Exception as e:
+            print(f"Batch dua generation failed for '{item.situation}': {str(e)}")
+            return key, None, str(e)
+        return key, dua_data, None
+    
+    async def result_stream():
+        pdf_entries = [None] * len(request.items)
+        new_cache_entries = {}
+        
+        def results_for(key: str, dua_data: dict, from_cache: bool):
+            for index in positions[key]:
+                item = request.items[index]
+                response = DuaResponse.from_dua(str(uuid.uuid4()), dua_data, item.situation, item.language)
+                pdf_entries[index] = {'dua_data': dua_data, 'situation': item.situation}
+                line = {"event": "result", "index": index, "cached": from_cache, "dua": response.dict()}
+                yield json.dumps(line, default=str, ensure_ascii=False) + "\n"
+        
+        # Cache hits are ready immediately
+        for key in unique_keys:
+            if cached.get(key):
+                for line in results_for(key, dua_from_cache(cached[key]), from_cache=True):
+                    yield line
+        
+        failed = 0
+        tasks = [asyncio.ensure_future(generate(key)) for key in misses]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                key, dua_data, error = await next_done
+                if error is not None:
+                    failed += 1
+                    for index in positions[key]:
+                        yield json.dumps({"event": "error", "index": index, "error": error}) + "\n"
+                    continue
+                
+                for line in results_for(key, dua_data, from_cache=False):
+                    yield line
+                
+                if not premium and dua_data.get('source') != 'fallback':
+                    item = request.items[positions[key][0]]
+                    response = DuaResponse.from_dua(str(uuid.uuid4()), dua_data, item.situation, item.language)
+                    new_cache_entries[key] = response.cache_entry()
+        finally:
+            # Client went away: stop work nobody will read
+            for task in tasks:
+                task.cancel()
         
-        if not os.path.exists(pdf_path):
-            # Generate PDF on demand if not exists
-            raise HTTPException(status_code=404, detail="PDF not found or still generating")
+        await cache_service.set_many(new_cache_entries, ttl=3600)
         
-        # Stream PDF file
-        def iterfile(file_path: str):
-            with open(file_path, "rb") as file:
-                yield from file
+        pdf_url = None
+        pdf_entries = [entry for entry in pdf_entries if entry is not None]
+        if request.combined_pdf and pdf_entries:
+            await enqueue_collection_pdf(batch_id, pdf_entries)
+            pdf_url = f"/api/dua/{batch_id}/pdf"
         
-        headers = {
-            'Content-Disposition': f'attachment; filename="BarakahTool_Dua_{dua_id}.pdf"',
-            'Content-Type': 'application/pdf'
+        summary = {
+            "event": "done",
+            "batch_id": batch_id,
+            "total": len(request.items),
+            "unique": len(unique_keys),
+            "cache_hits": len(unique_keys) - len(misses),
+            "generated": len(misses) - failed,
+            "failed": failed,
+            "pdf_url": pdf_url
         }
+        yield json.dumps(summary) + "\n"
+    
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str, ensure_ascii=False)}\n\n"
+
+# Generate Dua - streaming variant
+@app.post("/api/dua/generate/stream")
+async def generate_dua_stream(request: DuaRequest):
+    """
+    Stream dua sections as Server-Sent Events while the model is still writing
+    """
+    dua_id = str(uuid.uuid4())
+    cache_key = dua_service.cache_key(request.situation, request.language)
+    
+    cached_data = None
+    if not request.premium_features:
+        cached_data = await cache_service.get_json(cache_key)
+    
+    async def event_stream():
+        yield _sse("meta", {"id": dua_id})
+        
+        if cached_data:
+            cached_data['id'] = dua_id
+            response = DuaResponse(**cached_data)
+            await enqueue_pdf(dua_id, cached_pdf_data(response), response.situation)
+            yield _sse("section", {"section": "arabic", "text": response.arabic_text})
+            yield _sse("section", {"section": "transliteration", "text": response.transliteration or ""})
+            yield _sse("section", {"section": "translation", "text": response.translation})
+            yield _sse("complete", response.dict())
+            return
         
-        return StreamingResponse(
-            iterfile(pdf_path),
+        try:
+            async for event in dua_service.stream_dua(
+                situation=request.situation,
+                language=request.language,
+                premium=request.premium_features
+            ):
+                if event['event'] == 'section':
+                    yield _sse("section", {"section": event['section'], "text": event['text']})
+                elif event['event'] == 'fallback':
+                    yield _sse("fallback", {"source": "fallback"})
+                elif event['event'] == 'error':
+                    # Sections of this dua already went out; a fallback would mix two duas
+                    yield _sse("error", {"detail": event['detail']})
+                elif event['event'] == 'complete':
+                    dua_data = event['dua']
+                    response = DuaResponse.from_dua(dua_id, dua_data, request.situation, request.language)
+                    
+                    await enqueue_pdf(dua_id, dua_data, request.situation)
+                    
+                    if not request.premium_features and dua_data.get('source') != 'fallback':
+                        await cache_service.set_json(cache_key, response.cache_entry(), ttl=3600)
+                    
+                    yield _sse("complete", response.dict())
+        
+        except Exception as e:
+            yield _sse("error", {"detail": f"Dua generation failed: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Download PDF
+@app.api_route("/api/dua/{dua_id}/pdf", methods=["GET", "HEAD"])
+async def download_pdf(dua_id: str, request: Request, render: Optional[str] = None):
+    """
+    Download professional PDF for generated dua. Supports conditional
+    requests (ETag/Last-Modified) and Range for resumable downloads.
+    With ?render=inline a single-dua PDF that isn't stored yet is rendered
+    in memory and returned directly instead of answering 202, under the
+    job's lease; one already rendering in a worker is waited for instead of
+    rendered twice.
+    """
+    digest = await pdf_store.resolve(dua_id)
+    pdf_path = pdf_path_for(dua_id, digest)
+    
+    try:
+        if pdf_path is None:
+            raise FileNotFoundError(dua_id)
+        response = await serve_file(
+            request,
+            pdf_path,
             media_type='application/pdf',
-            headers=headers
+            filename=f"BarakahTool_Dua_{dua_id}.pdf",
+            headers={'Cache-Control': 'private, max-age=86400'}
         )
-        
+        if digest is not None:
+            await pdf_store.touch(digest)
+        return response
+    except FileNotFoundError:
+        pass
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF download failed: {str(e)}")
+    
+    if render == 'inline' and digest is not None:
+        job = await pdf_jobs.claim(digest, 'dua')
+        if job is not None:
+            response = await render_pdf_inline(dua_id, job)
+            if response is not None:
+                return response
+        elif (await pdf_jobs.get(digest) or {}).get('status') == 'running':
+            # A worker holds the lease: wait for its render instead of racing it
+            await pdf_jobs.wait(digest, PDF_STATUS_MAX_WAIT)
+            return await download_pdf(dua_id, request)
+    
+    # Not rendered yet (or evicted and now re-rendering): point the client at
+    # the status endpoint instead of letting it poll here
+    job = await pdf_job_status(dua_id)
+    if job and job['status'] not in TERMINAL_STATES:
+        return JSONResponse(
+            status_code=202,
+            content={"id": dua_id, "status": job['status'], "status_url": f"/api/dua/{dua_id}/pdf/status?wait=30"},
+            headers={"Retry-After": "2"}
+        )
+    
+    raise HTTPException(status_code=404, detail="PDF not found")
+
+# Cache and coalescing metrics
+@app.get("/api/metrics/dua")
+async def dua_metrics():
+    """
+    Expose dua caching and request coalescing counters
+    """
+    return {
+        "cache_available": cache_service.available,
+        "semantic_cache": dua_service.semantic_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "openai": dua_service.client.stats(),
+        "pdf_render": render_pool.stats(),
+        "pdf_jobs": await pdf_jobs.stats(),
+        "pdf_store": await pdf_store.stats()
+    }
+
+# Longest a status request may be held open
+PDF_STATUS_MAX_WAIT = config('PDF_STATUS_MAX_WAIT', default=30.0, cast=float)
+
+# PDF job status
+@app.get("/api/dua/{dua_id}/pdf/status")
+async def pdf_status(dua_id: str, wait: float = 0):
+    """
+    Report whether a PDF is queued, rendering, ready or failed. With
+    ?wait=<seconds> the request is held until the job finishes (long-poll).
+    """
+    job = await pdf_job_status(dua_id, wait=min(max(wait, 0), PDF_STATUS_MAX_WAIT))
+    if job is None:
+        raise HTTPException(status_code=404, detail="No PDF job for this dua")
+    return job
+
+# PDF job status - push variant
+@app.get("/api/dua/{dua_id}/pdf/events")
+async def pdf_events(dua_id: str):
+    """
+    Server-Sent Events: one 'status' event per state change, ending with
+    the job reaching done or failed
+    """
+    job = await pdf_job_status(dua_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No PDF job for this dua")
+    
+    async def event_stream():
+        current = job
+        last_status = None
+        while True:
+            if current['status'] != last_status:
+                last_status = current['status']
+                yield _sse("status", current)
+            if last_status in TERMINAL_STATES:
+                return
+            # Wakes on completion; intermediate queued/running changes show up on the next pass
+            current = await pdf_job_status(dua_id, wait=PDF_STATUS_MAX_WAIT) or current
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 # Payment endpoints
 @app.post("/api/payment/create-session")
@@ -254,27 +577,117 @@ async def get_pricing():
         ]
     }
 
-# Background task for PDF generation
-async def generate_pdf_background(dua_id: str, dua_data: dict, situation: str):
+# PDF job submission
+async def submit_pdf(ref_id: str, kind: str, inputs: dict):
     """
-    Generate PDF in background task
+    Point a dua/batch id at the PDF for these render inputs, queueing a
+    render only when no identical PDF is stored or already rendering
+    """
+    digest = pdf_store.digest(kind, inputs)
+    await pdf_store.link(ref_id, digest)
+    if not pdf_store.exists(digest):
+        await pdf_jobs.enqueue(digest, kind, {**inputs, 'output_path': pdf_store.path(digest)})
+
+async def enqueue_pdf(dua_id: str, dua_data: dict, situation: str):
+    """
+    Queue a professional PDF render for a dua
     """
     try:
-        # Ensure pdfs directory exists
-        os.makedirs("pdfs", exist_ok=True)
-        
-        # Generate professional PDF
-        pdf_path = f"pdfs/{dua_id}.pdf"
-        await pdf_generator.create_enterprise_pdf(
-            dua_data=dua_data,
-            situation=situation,
-            output_path=pdf_path
+        await submit_pdf(dua_id, 'dua', dua_render_inputs(dua_data, situation))
+    except Exception as e:
+        print(f"Failed to queue PDF for {dua_id}: {str(e)}")
+
+async def enqueue_collection_pdf(batch_id: str, entries: list):
+    """
+    Queue one combined PDF for a batch
+    """
+    try:
+        await submit_pdf(batch_id, 'collection', collection_render_inputs(entries))
+    except Exception as e:
+        print(f"Failed to queue collection PDF for {batch_id}: {str(e)}")
+
+def cached_pdf_data(response: DuaResponse) -> dict:
+    """Render fields of a cached dua response"""
+    return {
+        'arabic': response.arabic_text,
+        'transliteration': response.transliteration,
+        'translation': response.translation
+    }
+
+def pdf_path_for(dua_id: str, digest: Optional[str]) -> Optional[str]:
+    """Stored PDF for a dua id, if it is on disk"""
+    if digest is None:
+        # PDFs rendered before the content-addressed store
+        legacy_path = f"pdfs/{dua_id}.pdf"
+        return legacy_path if os.path.exists(legacy_path) else None
+    return pdf_store.path(digest) if pdf_store.exists(digest) else None
+
+async def render_pdf_inline(dua_id: str, job: dict) -> Optional[Response]:
+    """
+    Render a claimed single-dua job straight into the response. The bytes
+    are written to the store after the response is sent and only then is
+    the job marked done, so its lease keeps workers off it meanwhile. A
+    fallback render is sent uncached and never stored; the job is released
+    to the worker loop, which retries the full layout.
+    """
+    digest = job['id']
+    inputs = {key: value for key, value in job['payload'].items() if key != 'output_path'}
+    try:
+        ok, pdf_bytes = await render_pool.render_bytes(digest, 'dua', inputs)
+    except Exception as e:
+        print(f"Inline PDF render failed for {dua_id}: {str(e)}")
+        await pdf_jobs.release(digest, str(e))
+        return None
+    
+    headers = {'Content-Disposition': f'attachment; filename="BarakahTool_Dua_{dua_id}.pdf"'}
+    if not ok:
+        print(f"Inline PDF for {dua_id} used the fallback layout, not storing it")
+        await pdf_jobs.release(digest, 'Render fell back to the simplified layout')
+        return Response(
+            content=pdf_bytes,
+            media_type='application/pdf',
+            headers={**headers, 'Cache-Control': 'no-store'}
         )
-        
-        print(f"PDF generated successfully: {pdf_path}")
-        
+    
+    return Response(
+        content=pdf_bytes,
+        media_type='application/pdf',
+        headers={**headers, 'Cache-Control': 'private, max-age=86400'},
+        background=BackgroundTask(store_inline_pdf, digest, pdf_bytes)
+    )
+
+async def store_inline_pdf(digest: str, pdf_bytes: bytes):
+    try:
+        await pdf_store.write(digest, pdf_bytes)
+        await pdf_jobs.finish(digest)
     except Exception as e:
-        print(f"PDF generation failed for {dua_id}: {str(e)}")
+        print(f"Failed to store inline PDF {digest}: {str(e)}")
+        await pdf_jobs.release(digest, str(e))
+
+async def pdf_job_status(dua_id: str, wait: float = 0) -> Optional[Dict]:
+    """
+    Render job for a dua id, reported under that id. With wait, hold until
+    the job finishes or wait seconds pass.
+    """
+    digest = await pdf_store.resolve(dua_id)
+    job = None
+    if digest is not None:
+        if not pdf_store.exists(digest):
+            # Evicted from the store: render it again from the job's stored inputs
+            await pdf_jobs.requeue(digest)
+        job = await pdf_jobs.wait(digest, wait) if wait else await pdf_jobs.get(digest)
+    
+    if job is None:
+        if pdf_path_for(dua_id, digest) is None:
+            return None
+        job = {"status": "done"}
+    
+    job.update({
+        "id": dua_id,
+        "digest": digest,
+        "pdf_url": f"/api/dua/{dua_id}/pdf" if job['status'] == 'done' else None
+    })
+    return job
 
 if __name__ == "__main__":
     import uvicorn
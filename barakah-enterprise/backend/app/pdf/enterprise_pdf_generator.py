@@ -4,7 +4,7 @@ Professional PDF generation using ReportLab - NO HTML/CSS ISSUES
 """
 
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.colors import HexColor, white, black
 from reportlab.lib.units import inch, cm
@@ -14,29 +14,74 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.graphics.shapes import Drawing, Rect, Circle, String
 from reportlab.graphics import renderPDF
-import arabic_reshaper
-from bidi.algorithm import get_display
 from datetime import datetime
+from xml.sax.saxutils import escape
+import asyncio
 import os
 import io
 
+from pdf.font_manager import font_manager, shape_arabic
+
+# Bump whenever the layout changes, so stored PDFs are re-rendered
+TEMPLATE_VERSION = 3
+
+# The parts of a dua that appear on the page
+RENDER_FIELDS = ('arabic', 'transliteration', 'translation')
+
+BISMILLAH = "بِسْمِ اللَّهِ الرَّحْمَٰنِ الرَّحِيمِ"
+
+# Form XObject holding the border and header artwork shared by every page
+PAGE_ARTWORK_FORM = 'BarakahPageArtwork'
+
+GUIDANCE_POINTS = (
+    "• Best times: Last third of the night, between Adhan & Iqamah",
+    "• Recite with complete sincerity and trust in Allah's mercy",
+    "• Recommended repetitions: 3, 7, 11, or 33 times",
+    "• Maintain wudu and face Qiblah for maximum blessing",
+    "• Follow with personal supplications in your native language"
+)
+
+class DeferredSection(Flowable):
+    """
+    Placeholder for a booklet section, expanded into its flowables only when
+    layout reaches it, so a large booklet never holds every section at once
+    """
+
+    def __init__(self, build):
+        super().__init__()
+        self.build = build
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        pass
+
+class BookletDocTemplate(SimpleDocTemplate):
+    """Document template that expands deferred sections and builds the outline"""
+
+    def filterFlowables(self, flowables):
+        while flowables and isinstance(flowables[0], DeferredSection):
+            flowables[0:1] = flowables[0].build()
+
+    def afterFlowable(self, flowable):
+        outline = getattr(flowable, 'outline_entry', None)
+        if outline:
+            key, title = outline
+            self.canv.addOutlineEntry(title, key, level=0)
+
 class EnterprisePDFGenerator:
     def __init__(self):
         """Initialize the enterprise PDF generator"""
         self.setup_fonts()
         self.setup_colors()
         self.setup_styles()
+        # Parsed markup of the fixed paragraphs, by (text, style name)
+        self._static_frags = {}
     
     def setup_fonts(self):
-        """Setup Arabic and English fonts"""
-        try:
-            # Register Arabic fonts (you'd download these)
-            # pdfmetrics.registerFont(TTFont('Amiri', 'fonts/Amiri-Regular.ttf'))
-            # pdfmetrics.registerFont(TTFont('Amiri-Bold', 'fonts/Amiri-Bold.ttf'))
-            pass
-        except:
-            # Fallback to default fonts
-            pass
+        """Setup Arabic and English fonts (Amiri when installed, registered once per process)"""
+        self.fonts = font_manager.fonts()
     
     def setup_colors(self):
         """Setup color palette"""
@@ -81,7 +126,7 @@ class EnterprisePDFGenerator:
                 alignment=TA_CENTER,
                 spaceAfter=15,
                 spaceBefore=10,
-                fontName='Helvetica-Bold'
+                fontName=self.fonts['arabic']
             ),
             'transliteration': ParagraphStyle(
                 'Transliteration',
@@ -121,16 +166,8 @@ class EnterprisePDFGenerator:
         }
     
     def format_arabic_text(self, arabic_text: str) -> str:
-        """Format Arabic text for proper display"""
-        try:
-            # Reshape Arabic text for proper display
-            reshaped_text = arabic_reshaper.reshape(arabic_text)
-            # Apply bidirectional algorithm
-            bidi_text = get_display(reshaped_text)
-            return bidi_text
-        except:
-            # Fallback to original text
-            return arabic_text
+        """Format Arabic text for proper display (reshaped and bidi-ordered, memoized)"""
+        return shape_arabic(arabic_text)
     
     def draw_decorative_border(self, canvas_obj, doc):
         """Draw Islamic decorative border"""
@@ -168,10 +205,10 @@ class EnterprisePDFGenerator:
         width, height = A4
         
         # Bismillah decoration
-        canvas_obj.setFont('Helvetica-Bold', 16)
+        canvas_obj.setFont(self.fonts['arabic_bold'], 16)
         canvas_obj.setFillColor(self.colors['primary'])
-        canvas_obj.drawCentredText(width/2, height - 1.5*inch, 
-                                 "بِسْمِ اللَّهِ الرَّحْمَٰنِ الرَّحِيمِ")
+        canvas_obj.drawCentredString(width/2, height - 1.5*inch, 
+                                 self.format_arabic_text(BISMILLAH))
         
         # Decorative line under header
         canvas_obj.setStrokeColor(self.colors['secondary'])
@@ -180,7 +217,13 @@ class EnterprisePDFGenerator:
     
     async def create_enterprise_pdf(self, dua_data: dict, situation: str, output_path: str):
         """
-        Create enterprise-grade PDF with professional layout
+        Create enterprise-grade PDF without blocking the event loop
+        """
+        return await asyncio.to_thread(self.render_enterprise_pdf, dua_data, situation, output_path)
+    
+    def render_enterprise_pdf(self, dua_data: dict, situation: str, output_path: str) -> bool:
+        """
+        Create enterprise-grade PDF with professional layout (blocking)
         """
         try:
             # Create document
@@ -193,118 +236,243 @@ class EnterprisePDFGenerator:
                 bottomMargin=1*inch
             )
             
-            # Story elements
-            story = []
-            
-            # Title section
-            story.append(Paragraph("Sacred Islamic Supplication", self.styles['title']))
-            story.append(Paragraph("Generated by BarakahTool Enterprise", self.styles['subtitle']))
-            story.append(Spacer(1, 20))
-            
-            # Situation section
-            story.append(Paragraph(f"<b>Your Request:</b>", self.styles['guidance']))
-            story.append(Paragraph(situation, self.styles['guidance']))
-            story.append(Spacer(1, 15))
+            story = self._build_dua_story(dua_data, situation)
             
-            # Arabic section with background
-            arabic_text = self.format_arabic_text(dua_data.get('arabic', ''))
-            story.append(Paragraph("Arabic Supplication", self.styles['subtitle']))
+            # Build PDF with custom page template
+            doc.build(story, onFirstPage=self._add_page_decorations, onLaterPages=self._add_page_decorations)
             
-            # Create table for Arabic text with background
-            arabic_table_data = [[Paragraph(arabic_text, self.styles['arabic'])]]
-            arabic_table = Table(arabic_table_data, colWidths=[6*inch])
-            arabic_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), self.colors['background']),
-                ('BORDER', (0, 0), (-1, -1), 2, self.colors['border']),
-                ('PADDING', (0, 0), (-1, -1), 15),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-            story.append(arabic_table)
-            story.append(Spacer(1, 20))
+            print(f"✅ Enterprise PDF generated successfully: {output_path}")
+            return True
             
-            # Transliteration section
-            if dua_data.get('transliteration'):
-                story.append(Paragraph("Pronunciation Guide", self.styles['subtitle']))
-                transliteration_table_data = [[Paragraph(dua_data['transliteration'], self.styles['transliteration'])]]
-                transliteration_table = Table(transliteration_table_data, colWidths=[6*inch])
-                transliteration_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, -1), HexColor('#f0fff0')),
-                    ('BORDER', (0, 0), (-1, -1), 1, self.colors['secondary']),
-                    ('PADDING', (0, 0), (-1, -1), 12),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ]))
-                story.append(transliteration_table)
-                story.append(Spacer(1, 15))
+        except Exception as e:
+            print(f"❌ PDF generation failed: {str(e)}")
             
-            # Translation section
-            story.append(Paragraph("English Translation", self.styles['subtitle']))
-            translation_text = f'"{dua_data.get("translation", "")}"'
-            translation_table_data = [[Paragraph(translation_text, self.styles['translation'])]]
-            translation_table = Table(translation_table_data, colWidths=[6*inch])
-            translation_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), HexColor('#fff0f5')),
-                ('BORDER', (0, 0), (-1, -1), 1, self.colors['accent']),
-                ('PADDING', (0, 0), (-1, -1), 15),
+            # Create fallback simple PDF
+            self._render_fallback_pdf(dua_data, situation, output_path)
+            return False
+    
+    def _build_dua_story(self, dua_data: dict, situation: str, heading: Flowable = None) -> list:
+        """
+        Build the flowables for one dua. Booklet sections pass their own
+        heading and leave the document-level title and date to the cover.
+        """
+        # Story elements
+        story = []
+        
+        static = self._build_static_flowables()
+        
+        # Title section
+        if heading is None:
+            story.extend(static['title'])
+        else:
+            story.append(heading)
+        
+        # Situation section
+        story.append(static['request_label'])
+        story.append(Paragraph(escape(situation), self.styles['guidance']))
+        story.append(Spacer(1, 15))
+        
+        # Arabic section with background
+        arabic_text = escape(self.format_arabic_text(dua_data.get('arabic', '')))
+        story.append(static['arabic_heading'])
+        
+        # Create table for Arabic text with background
+        arabic_table_data = [[Paragraph(arabic_text, self.styles['arabic'])]]
+        arabic_table = Table(arabic_table_data, colWidths=[6*inch])
+        arabic_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), self.colors['background']),
+            ('BORDER', (0, 0), (-1, -1), 2, self.colors['border']),
+            ('PADDING', (0, 0), (-1, -1), 15),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]))
+        story.append(arabic_table)
+        story.append(Spacer(1, 20))
+        
+        # Transliteration section
+        if dua_data.get('transliteration'):
+            story.append(static['transliteration_heading'])
+            transliteration_table_data = [[Paragraph(escape(dua_data['transliteration']), self.styles['transliteration'])]]
+            transliteration_table = Table(transliteration_table_data, colWidths=[6*inch])
+            transliteration_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, -1), HexColor('#f0fff0')),
+                ('BORDER', (0, 0), (-1, -1), 1, self.colors['secondary']),
+                ('PADDING', (0, 0), (-1, -1), 12),
                 ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
             ]))
-            story.append(translation_table)
-            story.append(Spacer(1, 20))
-            
-            # Spiritual guidance section
-            story.append(Paragraph("Spiritual Guidance", self.styles['subtitle']))
-            guidance_points = [
-                "• Best times: Last third of the night, between Adhan & Iqamah",
-                "• Recite with complete sincerity and trust in Allah's mercy",
-                "• Recommended repetitions: 3, 7, 11, or 33 times",
-                "• Maintain wudu and face Qiblah for maximum blessing",
-                "• Follow with personal supplications in your native language"
+            story.append(transliteration_table)
+            story.append(Spacer(1, 15))
+        
+        # Translation section
+        story.append(static['translation_heading'])
+        translation_text = f'"{escape(dua_data.get("translation", ""))}"'
+        translation_table_data = [[Paragraph(translation_text, self.styles['translation'])]]
+        translation_table = Table(translation_table_data, colWidths=[6*inch])
+        translation_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), HexColor('#fff0f5')),
+            ('BORDER', (0, 0), (-1, -1), 1, self.colors['accent']),
+            ('PADDING', (0, 0), (-1, -1), 15),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ]))
+        story.append(translation_table)
+        story.append(Spacer(1, 20))
+        
+        # Spiritual guidance section
+        story.extend(static['guidance'])
+        
+        # Footer
+        if heading is None:
+            story.extend(static['footer'])
+            story.append(Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y')}", self.styles['footer']))
+        else:
+            story.append(static['footer'][0])
+        
+        return story
+    
+    def _static_paragraph(self, text: str, style: str) -> Paragraph:
+        """
+        A new Paragraph for fixed text, built from markup parsed once per
+        generator. Parsing is most of the cost of creating a Paragraph, and
+        the parsed fragments are only read during layout, so they are shared.
+        """
+        key = (text, style)
+        frags = self._static_frags.get(key)
+        if frags is None:
+            frags = self._static_frags[key] = Paragraph(text, self.styles[style]).frags
+        return Paragraph(text, self.styles[style], frags=frags)
+    
+    def _build_static_flowables(self) -> dict:
+        """
+        Build the fixed titles, headings, guidance table and footer. The
+        instances are new for every story: ReportLab marks a flowable it
+        pushes to the next page as postponed and never clears it, so a reused
+        one fails layout ("too large") in the next document or booklet
+        section. Only their parsed markup is cached.
+        """
+        guidance_table = Table(
+            [[self._static_paragraph(point, 'guidance')] for point in GUIDANCE_POINTS],
+            colWidths=[6*inch]
+        )
+        guidance_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), HexColor('#f0ffff')),
+            ('BORDER', (0, 0), (-1, -1), 1, HexColor('#006B6B')),
+            ('PADDING', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ]))
+        
+        return {
+            'title': [
+                self._static_paragraph("Sacred Islamic Supplication", 'title'),
+                self._static_paragraph("Generated by BarakahTool Enterprise", 'subtitle'),
+                Spacer(1, 20)
+            ],
+            'request_label': self._static_paragraph("<b>Your Request:</b>", 'guidance'),
+            'arabic_heading': self._static_paragraph("Arabic Supplication", 'subtitle'),
+            'transliteration_heading': self._static_paragraph("Pronunciation Guide", 'subtitle'),
+            'translation_heading': self._static_paragraph("English Translation", 'subtitle'),
+            'guidance': [
+                self._static_paragraph("Spiritual Guidance", 'subtitle'),
+                guidance_table,
+                Spacer(1, 30)
+            ],
+            'footer': [
+                self._static_paragraph("May Allah accept your supplication and grant you success", 'footer'),
+                self._static_paragraph("BarakahTool Enterprise - Premium Islamic Digital Platform", 'footer')
             ]
+        }
+    
+    async def create_collection_pdf(self, entries: list, output_path: str, title: str = "Collection of Islamic Supplications"):
+        """
+        Create a multi-dua PDF without blocking the event loop
+        """
+        return await asyncio.to_thread(self.render_collection_pdf, entries, output_path, title)
+    
+    def render_collection_pdf(self, entries: list, output_path: str, title: str = "Collection of Islamic Supplications") -> bool:
+        """
+        Create a booklet of several duas in a single document build (blocking):
+        a cover with a linked table of contents, then one section per dua,
+        each also listed in the PDF outline. Each entry is a dict with
+        'dua_data' and 'situation'. There is no fallback layout for a
+        booklet, so a failure raises and its cause reaches the job queue.
+        """
+        try:
+            doc = BookletDocTemplate(
+                output_path,
+                pagesize=A4,
+                rightMargin=1*inch,
+                leftMargin=1*inch,
+                topMargin=1.5*inch,
+                bottomMargin=1*inch,
+                title=title,
+                creator="BarakahTool Enterprise"
+            )
             
-            guidance_table_data = []
-            for point in guidance_points:
-                guidance_table_data.append([Paragraph(point, self.styles['guidance'])])
-            
-            guidance_table = Table(guidance_table_data, colWidths=[6*inch])
-            guidance_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), HexColor('#f0ffff')),
-                ('BORDER', (0, 0), (-1, -1), 1, HexColor('#006B6B')),
-                ('PADDING', (0, 0), (-1, -1), 8),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ]))
-            story.append(guidance_table)
-            story.append(Spacer(1, 30))
-            
-            # Footer
-            story.append(Paragraph("May Allah accept your supplication and grant you success", self.styles['footer']))
-            story.append(Paragraph("BarakahTool Enterprise - Premium Islamic Digital Platform", self.styles['footer']))
-            story.append(Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y')}", self.styles['footer']))
+            story = self._build_booklet_cover(entries, title)
+            for number, entry in enumerate(entries, start=1):
+                story.append(DeferredSection(
+                    lambda number=number, entry=entry: self._build_booklet_section(number, entry)
+                ))
             
-            # Build PDF with custom page template
             doc.build(story, onFirstPage=self._add_page_decorations, onLaterPages=self._add_page_decorations)
             
-            print(f"✅ Enterprise PDF generated successfully: {output_path}")
+            print(f"✅ Collection PDF generated successfully: {output_path}")
             return True
             
         except Exception as e:
-            print(f"❌ PDF generation failed: {str(e)}")
-            
-            # Create fallback simple PDF
-            await self._create_fallback_pdf(dua_data, situation, output_path)
-            return False
+            print(f"❌ Collection PDF generation failed: {str(e)}")
+            raise
+    
+    def _build_booklet_cover(self, entries: list, title: str) -> list:
+        """Cover page and table of contents linking to each section"""
+        cover = [
+            Paragraph(escape(title), self.styles['title']),
+            Paragraph(f"{len(entries)} supplications - BarakahTool Enterprise", self.styles['subtitle']),
+            Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y')}", self.styles['footer']),
+            Spacer(1, 30),
+            Paragraph("Contents", self.styles['subtitle'])
+        ]
+        for number, entry in enumerate(entries, start=1):
+            cover.append(Paragraph(
+                f'<a href="#dua-{number}">{number}. {escape(entry["situation"])}</a>',
+                self.styles['guidance']
+            ))
+        return cover
+    
+    def _build_booklet_section(self, number: int, entry: dict) -> list:
+        """
+        Flowables for one booklet section, all new instances: a flowable
+        postponed to the next page in one section must not be reused by the next
+        """
+        heading = Paragraph(
+            f'<a name="dua-{number}"/>{number}. {escape(entry["situation"])}',
+            self.styles['title']
+        )
+        heading.outline_entry = (f"dua-{number}", f"{number}. {entry['situation']}")
+        return [PageBreak()] + self._build_dua_story(entry['dua_data'], entry['situation'], heading=heading)
     
     def _add_page_decorations(self, canvas_obj, doc):
         """Add decorative elements to each page"""
-        self.draw_decorative_border(canvas_obj, doc)
-        self.add_header_decoration(canvas_obj)
+        # Multi-page documents compile the static artwork into a form XObject
+        # once and reference it from every later page instead of redrawing it.
+        # A lone page draws directly, as the extra object would cost more.
+        if canvas_obj.getPageNumber() == 1:
+            self.draw_decorative_border(canvas_obj, doc)
+            self.add_header_decoration(canvas_obj)
+        else:
+            if not canvas_obj.hasForm(PAGE_ARTWORK_FORM):
+                canvas_obj.beginForm(PAGE_ARTWORK_FORM)
+                self.draw_decorative_border(canvas_obj, doc)
+                self.add_header_decoration(canvas_obj)
+                canvas_obj.endForm()
+            canvas_obj.doForm(PAGE_ARTWORK_FORM)
         
         # Add page number
         width, height = A4
         canvas_obj.setFont('Helvetica', 8)
         canvas_obj.setFillColor(self.colors['text'])
-        canvas_obj.drawCentredText(width/2, 0.5*inch, f"Page {canvas_obj.getPageNumber()}")
+        canvas_obj.drawCentredString(width/2, 0.5*inch, f"Page {canvas_obj.getPageNumber()}")
     
-    async def _create_fallback_pdf(self, dua_data: dict, situation: str, output_path: str):
+    def _render_fallback_pdf(self, dua_data: dict, situation: str, output_path: str):
         """Create a simple fallback PDF if main generation fails"""
         try:
             from reportlab.pdfgen import canvas
@@ -313,26 +481,26 @@ class EnterprisePDFGenerator:
             
             # Simple layout
             c.setFont('Helvetica-Bold', 20)
-            c.drawCentredText(width/2, height - 100, "BarakahTool - Islamic Dua")
+            c.drawCentredString(width/2, height - 100, "BarakahTool - Islamic Dua")
             
             c.setFont('Helvetica', 12)
-            c.drawCentredText(width/2, height - 140, f"Situation: {situation}")
+            c.drawCentredString(width/2, height - 140, f"Situation: {situation}")
             
             c.setFont('Helvetica-Bold', 16)
-            c.drawCentredText(width/2, height - 200, "Arabic:")
-            c.drawCentredText(width/2, height - 230, dua_data.get('arabic', 'Arabic text'))
+            c.drawCentredString(width/2, height - 200, "Arabic:")
+            c.drawCentredString(width/2, height - 230, dua_data.get('arabic', 'Arabic text'))
             
             if dua_data.get('transliteration'):
                 c.setFont('Helvetica-Oblique', 14)
-                c.drawCentredText(width/2, height - 280, "Pronunciation:")
-                c.drawCentredText(width/2, height - 300, dua_data['transliteration'])
+                c.drawCentredString(width/2, height - 280, "Pronunciation:")
+                c.drawCentredString(width/2, height - 300, dua_data['transliteration'])
             
             c.setFont('Helvetica', 12)
-            c.drawCentredText(width/2, height - 350, "Translation:")
-            c.drawCentredText(width/2, height - 380, dua_data.get('translation', 'Translation'))
+            c.drawCentredString(width/2, height - 350, "Translation:")
+            c.drawCentredString(width/2, height - 380, dua_data.get('translation', 'Translation'))
             
             c.setFont('Helvetica-Bold', 10)
-            c.drawCentredText(width/2, height - 450, "BarakahTool Enterprise Platform")
+            c.drawCentredString(width/2, height - 450, "BarakahTool Enterprise Platform")
             
             c.save()
             print(f"✅ Fallback PDF created: {output_path}")
@@ -0,0 +1,82 @@
+"""
+BarakahTool Enterprise PDF Font Manager
+Registers TrueType fonts once per process and memoizes Arabic shaping
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import arabic_reshaper
+from bidi.algorithm import get_display
+from decouple import config
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'fonts')
+
+# Core PDF fonts used when no Arabic TTF is installed
+FALLBACK_FONTS = {'arabic': 'Helvetica-Bold', 'arabic_bold': 'Helvetica-Bold'}
+
+@lru_cache(maxsize=config('PDF_SHAPING_CACHE_SIZE', default=2048, cast=int))
+def shape_arabic(text: str) -> str:
+    """
+    Reshape Arabic letters into their joined forms and reorder for display.
+    Memoized: cached duas, fallback duas and the Bismillah recur constantly.
+    """
+    try:
+        return get_display(arabic_reshaper.reshape(text))
+    except Exception:
+        # Fallback to original text
+        return text
+
+class FontManager:
+    def __init__(self):
+        """
+        Initialize the font manager. Arabic fonts default to Amiri under
+        app/fonts/ and are only used when the files exist.
+        """
+        self.font_files = {
+            'arabic': ('Amiri', config('PDF_ARABIC_FONT', default=os.path.join(FONTS_DIR, 'Amiri-Regular.ttf'))),
+            'arabic_bold': ('Amiri-Bold', config('PDF_ARABIC_FONT_BOLD', default=os.path.join(FONTS_DIR, 'Amiri-Bold.ttf')))
+        }
+        self._fonts: Optional[Dict[str, str]] = None
+
+    def fonts(self) -> Dict[str, str]:
+        """
+        Role -> registered font name. TrueType files are parsed and registered
+        with ReportLab once per process; ReportLab then embeds only the glyphs
+        each document uses, as subsets, rather than the whole font.
+        """
+        if self._fonts is None:
+            fonts = dict(FALLBACK_FONTS)
+            for role, (name, path) in self.font_files.items():
+                if self._register(name, path):
+                    fonts[role] = name
+            self._fonts = fonts
+        return self._fonts
+
+    def signature(self) -> Tuple:
+        """
+        Which font files a render would use, without parsing them. Part of
+        the PDF store digest, so installing a font re-renders stored PDFs.
+        """
+        return tuple(
+            (name, os.path.getsize(path)) for name, path in self.font_files.values() if os.path.isfile(path)
+        )
+
+    @staticmethod
+    def _register(name: str, path: str) -> bool:
+        if name in pdfmetrics.getRegisteredFontNames():
+            return True
+        if not os.path.isfile(path):
+            return False
+        try:
+            pdfmetrics.registerFont(TTFont(name, path))
+            return True
+        except Exception as e:
+            print(f"Failed to register font {name} from {path}: {str(e)}")
+            return False
+
+# Create singleton instance
+font_manager = FontManager()
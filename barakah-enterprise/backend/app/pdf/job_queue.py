@@ -0,0 +1,355 @@
+"""
+BarakahTool Enterprise PDF Job Queue
+Durable SQLite-backed queue of PDF renders with retries and status tracking
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+from decouple import config
+
+from pdf.render_pool import PDFRenderPool, RenderQueueFull
+
+TERMINAL_STATES = ('done', 'failed')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdf_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    queued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    next_attempt_at REAL NOT NULL,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS pdf_jobs_claimable ON pdf_jobs (status, next_attempt_at);
+"""
+
+class PDFJobQueue:
+    def __init__(self, render_pool: PDFRenderPool,
+                 on_done: Optional[Callable[[Dict], Awaitable[None]]] = None):
+        """
+        Initialize the job queue. Jobs live in a SQLite file next to the PDFs,
+        so they survive restarts and are shared by every worker process.
+        on_done is awaited with each job whose PDF was written.
+        """
+        self.render_pool = render_pool
+        self.on_done = on_done
+        self.db_path = config('PDF_JOBS_DB', default='pdfs/jobs.sqlite3')
+        self.max_attempts = config('PDF_JOB_MAX_ATTEMPTS', default=3, cast=int)
+        self.retry_delay = config('PDF_JOB_RETRY_DELAY', default=2.0, cast=float)
+        self.lease_seconds = config('PDF_JOB_LEASE', default=120.0, cast=float)
+        self.poll_interval = config('PDF_JOB_POLL_INTERVAL', default=1.0, cast=float)
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._changed: Optional[asyncio.Condition] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._running: set = set()
+        self._initialized = False
+
+    async def enqueue(self, job_id: str, kind: str, payload: dict) -> Dict:
+        """
+        Record a render job; the worker loop picks it up. A job that is
+        already queued or running is left alone, so identical PDFs
+        requested concurrently render once; finished jobs are queued again.
+        """
+        job = await asyncio.to_thread(self._insert, job_id, kind, payload)
+        self._get_wakeup().set()
+        return job
+
+    async def requeue(self, job_id: str) -> Optional[Dict]:
+        """Render a done job again from its stored inputs (e.g. after eviction)"""
+        job = await asyncio.to_thread(self._requeue_finished, job_id)
+        self._get_wakeup().set()
+        return job
+
+    async def get(self, job_id: str, with_payload: bool = False) -> Optional[Dict]:
+        """Status and timings of a job, optionally with its render inputs"""
+        return await asyncio.to_thread(self._select, job_id, with_payload)
+
+    async def claim(self, job_id: str, kind: str) -> Optional[Dict]:
+        """
+        Take the lease on one job to render it outside the worker loop
+        (inline), with its payload. None if there is no such job or a worker
+        already holds a live lease on it; then wait() for that render instead.
+        Settle a claimed job with finish() or release().
+        """
+        return await asyncio.to_thread(self._claim_one, job_id, kind)
+
+    async def finish(self, job_id: str):
+        """Mark a claimed job done because its PDF was rendered and stored"""
+        await asyncio.to_thread(self._finish, job_id, 'done', None)
+        await self._notify()
+
+    async def release(self, job_id: str, error: str):
+        """Hand a claimed job whose render failed back to the worker loop"""
+        await asyncio.to_thread(self._requeue, job_id, 0.0, False, error)
+        self._get_wakeup().set()
+        await self._notify()
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """
+        Long-poll: return once the job reaches done/failed or timeout expires.
+        Jobs finished by this process wake waiters at once; the periodic
+        re-read catches jobs finished by other worker processes.
+        """
+        deadline = time.monotonic() + timeout
+        changed = self._get_changed()
+
+        while True:
+            job = await self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in TERMINAL_STATES or remaining <= 0:
+                return job
+
+            async with changed:
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=min(remaining, self.poll_interval))
+                except asyncio.TimeoutError:
+                    pass
+
+    async def start(self):
+        """Start the worker loop"""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._work())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def stats(self) -> Dict:
+        counts = await asyncio.to_thread(self._counts)
+        return {'jobs': counts, 'in_flight': len(self._running)}
+
+    async def _work(self):
+        """Claim due jobs while render slots are free"""
+        slots = max(self.render_pool.workers, 1)
+        wakeup = self._get_wakeup()
+
+        while True:
+            try:
+                # Cleared before looking, so an enqueue during the claim isn't missed
+                wakeup.clear()
+                job = None
+                if len(self._running) < slots:
+                    job = await asyncio.to_thread(self._claim)
+
+                if job:
+                    task = asyncio.create_task(self._process(job))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+                    continue
+
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"PDF job worker error: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _process(self, job: Dict):
+        output_path = job['payload']['output_path']
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+        try:
+            ok = await self.render_pool.render(job['id'], job['kind'], job['payload'])
+            if ok:
+                await asyncio.to_thread(self._finish, job['id'], 'done', None)
+                print(f"PDF generated successfully: {output_path}")
+                if self.on_done is not None:
+                    try:
+                        await self.on_done(job)
+                    except Exception as e:
+                        print(f"PDF job completion hook failed for {job['id']}: {str(e)}")
+            else:
+                # The simplified fallback layout was rendered and discarded; only single
+                # duas have one, a failed collection raises with its real cause
+                await self._retry_or_fail(job, 'Render fell back to the simplified layout')
+
+        except RenderQueueFull:
+            # Backpressure, not a failure: try again shortly without using an attempt
+            await asyncio.to_thread(self._requeue, job['id'], self.retry_delay, True)
+
+        except Exception as e:
+            print(f"PDF generation failed for {job['id']}: {str(e)}")
+            await self._retry_or_fail(job, str(e))
+
+        finally:
+            self._get_wakeup().set()
+            await self._notify()
+
+    async def _retry_or_fail(self, job: Dict, error: str):
+        if job['attempts'] >= self.max_attempts:
+            await asyncio.to_thread(self._finish, job['id'], 'failed', error)
+        else:
+            delay = self.retry_delay * (2 ** (job['attempts'] - 1))
+            await asyncio.to_thread(self._requeue, job['id'], delay, False, error)
+
+    async def _notify(self):
+        changed = self._get_changed()
+        async with changed:
+            changed.notify_all()
+
+    def _get_wakeup(self) -> asyncio.Event:
+        # Created lazily so it binds to the running event loop
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    def _get_changed(self) -> asyncio.Condition:
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    # SQLite access, run on worker threads
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            if not self._initialized:
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.executescript(SCHEMA)
+                self._initialized = True
+            yield connection
+        finally:
+            connection.close()
+
+    def _insert(self, job_id: str, kind: str, payload: dict) -> Dict:
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO pdf_jobs (id, kind, payload, status, attempts, queued_at, next_attempt_at) "
+                "VALUES (?, ?, ?, 'queued', 0, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET kind = excluded.kind, payload = excluded.payload, "
+                "status = 'queued', attempts = 0, error = NULL, queued_at = excluded.queued_at, "
+                "started_at = NULL, finished_at = NULL, next_attempt_at = excluded.next_attempt_at "
+                "WHERE pdf_jobs.status IN ('done', 'failed')",
+                (job_id, kind, json.dumps(payload, default=str, ensure_ascii=False), now, now)
+            )
+            return self._row(connection, job_id)
+
+    def _requeue_finished(self, job_id: str) -> Optional[Dict]:
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE pdf_jobs SET status = 'queued', attempts = 0, error = NULL, queued_at = ?, "
+                "started_at = NULL, finished_at = NULL, next_attempt_at = ? "
+                "WHERE id = ? AND status = 'done'",
+                (now, now, job_id)
+            )
+            return self._row(connection, job_id)
+
+    def _select(self, job_id: str, with_payload: bool) -> Optional[Dict]:
+        with self._connect() as connection:
+            job = self._row(connection, job_id)
+            if job and with_payload:
+                job['payload'] = self._payload(connection, job_id)
+            return job
+
+    def _claim_one(self, job_id: str, kind: str) -> Optional[Dict]:
+        # Compare-and-set in one UPDATE: a live lease, ours or a worker's, wins.
+        # Attempts are left alone; they budget the worker loop's retries.
+        now = time.time()
+        with self._connect() as connection:
+            claimed = connection.execute(
+                "UPDATE pdf_jobs SET status = 'running', started_at = ?, finished_at = NULL, "
+                "lease_until = ? WHERE id = ? AND kind = ? "
+                "AND (status IN ('queued', 'failed', 'done') OR (status = 'running' AND lease_until < ?))",
+                (now, now + self.lease_seconds, job_id, kind, now)
+            ).rowcount
+            if not claimed:
+                return None
+
+            job = self._row(connection, job_id)
+            job['payload'] = self._payload(connection, job_id)
+            return job
+
+    def _claim(self) -> Optional[Dict]:
+        """
+        Atomically take the oldest due job. Running jobs whose lease expired
+        (their worker died mid-render) are claimed again.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = connection.execute(
+                    "SELECT id FROM pdf_jobs "
+                    "WHERE (status = 'queued' AND next_attempt_at <= ?) "
+                    "OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY queued_at LIMIT 1",
+                    (now, now)
+                ).fetchone()
+                if row is None:
+                    connection.execute('COMMIT')
+                    return None
+
+                connection.execute(
+                    "UPDATE pdf_jobs SET status = 'running', attempts = attempts + 1, "
+                    "started_at = ?, lease_until = ? WHERE id = ?",
+                    (now, now + self.lease_seconds, row['id'])
+                )
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+
+            job = self._row(connection, row['id'])
+            job['payload'] = self._payload(connection, row['id'])
+            return job
+
+    def _finish(self, job_id: str, status: str, error: Optional[str]):
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE pdf_jobs SET status = ?, error = ?, finished_at = ?, lease_until = NULL WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+
+    def _requeue(self, job_id: str, delay: float, refund_attempt: bool, error: Optional[str] = None):
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE pdf_jobs SET status = 'queued', error = ?, next_attempt_at = ?, lease_until = NULL, "
+                "attempts = attempts - ? WHERE id = ?",
+                (error, time.time() + delay, 1 if refund_attempt else 0, job_id)
+            )
+
+    def _counts(self) -> Dict[str, int]:
+        with self._connect() as connection:
+            rows = connection.execute("SELECT status, COUNT(*) AS n FROM pdf_jobs GROUP BY status").fetchall()
+            return {row['status']: row['n'] for row in rows}
+
+    @staticmethod
+    def _payload(connection: sqlite3.Connection, job_id: str) -> Dict:
+        row = connection.execute("SELECT payload FROM pdf_jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row['payload'])
+
+    @staticmethod
+    def _row(connection: sqlite3.Connection, job_id: str) -> Optional[Dict]:
+        row = connection.execute(
+            "SELECT id, kind, status, attempts, error, queued_at, started_at, finished_at "
+            "FROM pdf_jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        return dict(row) if row else None
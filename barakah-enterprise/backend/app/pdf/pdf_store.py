@@ -0,0 +1,266 @@
+"""
+BarakahTool Enterprise PDF Store
+Content-addressed PDF storage: identical render inputs share one file,
+kept within a byte budget by LRU/TTL eviction
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from decouple import config
+
+from pdf.enterprise_pdf_generator import RENDER_FIELDS, TEMPLATE_VERSION
+from pdf.font_manager import font_manager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdf_refs (
+    id TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pdf_refs_digest ON pdf_refs (digest);
+CREATE TABLE IF NOT EXISTS pdf_objects (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pdf_objects_lru ON pdf_objects (last_access);
+"""
+
+# Access times closer together than this are not worth a write
+TOUCH_RESOLUTION = 60.0
+
+def dua_render_inputs(dua_data: dict, situation: str) -> Dict:
+    """Only what the template draws, so irrelevant fields don't split the cache"""
+    return {
+        'dua_data': {field: dua_data.get(field) or '' for field in RENDER_FIELDS},
+        'situation': situation
+    }
+
+def collection_render_inputs(entries: List[dict]) -> Dict:
+    return {
+        'entries': [dua_render_inputs(entry['dua_data'], entry['situation']) for entry in entries]
+    }
+
+class PDFStore:
+    def __init__(self):
+        """
+        Initialize the store. PDFs live under PDF_STORE_DIR named by digest,
+        sharded two levels deep by digest prefix; the dua/batch id -> digest
+        mapping and per-file access times are kept in SQLite alongside them.
+        """
+        self.root = config('PDF_STORE_DIR', default='pdfs')
+        self.objects_dir = os.path.join(self.root, 'objects')
+        self.db_path = config('PDF_STORE_DB', default=os.path.join(self.root, 'store.sqlite3'))
+        self.max_bytes = config('PDF_STORE_MAX_BYTES', default=5 * 1024 ** 3, cast=int)
+        # Evict down to this fraction of the budget, so eviction doesn't run on every write
+        self.low_water = config('PDF_STORE_LOW_WATER', default=0.9, cast=float)
+        self.ttl = config('PDF_STORE_TTL_DAYS', default=30.0, cast=float) * 86400
+        # Refs outlive their PDF, so an evicted one can be re-rendered on demand;
+        # past this age (since last linked) a ref without a stored PDF is dropped
+        self.ref_ttl = config('PDF_REF_TTL_DAYS', default=180.0, cast=float) * 86400
+        self.sweep_interval = config('PDF_STORE_SWEEP_INTERVAL', default=300.0, cast=float)
+
+        self._initialized = False
+        self._sweeper: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def digest(kind: str, inputs: dict) -> str:
+        """Digest of the render inputs, template version and installed fonts"""
+        canonical = json.dumps(
+            {'kind': kind, 'template': TEMPLATE_VERSION, 'fonts': font_manager.signature(), 'inputs': inputs},
+            sort_keys=True, ensure_ascii=False, separators=(',', ':')
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest[2:4], f"{digest}.pdf")
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    async def link(self, ref_id: str, digest: str):
+        """Point a dua (or batch) id at a stored PDF"""
+        await asyncio.to_thread(self._link, ref_id, digest)
+
+    async def resolve(self, ref_id: str) -> Optional[str]:
+        """Digest a dua id points at, if any"""
+        return await asyncio.to_thread(self._resolve, ref_id)
+
+    async def write(self, digest: str, data: bytes):
+        """Store PDF bytes rendered in memory (temp file, then rename), then register them"""
+        await asyncio.to_thread(self._write, digest, data)
+        await self.register(digest)
+
+    async def register(self, digest: str):
+        """Record a freshly written PDF, evicting others if over budget"""
+        total = await asyncio.to_thread(self._register, digest)
+        if total > self.max_bytes:
+            await self.evict()
+
+    async def touch(self, digest: str):
+        """Mark a PDF as recently used (called on download)"""
+        await asyncio.to_thread(self._touch, digest)
+
+    async def evict(self) -> int:
+        """Remove expired PDFs, then least recently used ones over budget"""
+        evicted = await asyncio.to_thread(self._evict)
+        if evicted:
+            print(f"Evicted {evicted} PDFs from store")
+        return evicted
+
+    async def start(self):
+        """Start the periodic eviction sweep"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep())
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def stats(self) -> Dict:
+        refs, digests, files, total = await asyncio.to_thread(self._counts)
+        return {'refs': refs, 'unique_pdfs': digests, 'stored_pdfs': files,
+                'bytes': total, 'max_bytes': self.max_bytes}
+
+    async def _sweep(self):
+        while True:
+            try:
+                await self.evict()
+            except Exception as e:
+                print(f"PDF store sweep failed: {str(e)}")
+            await asyncio.sleep(self.sweep_interval)
+
+    # SQLite access, run on worker threads
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            os.makedirs(self.objects_dir, exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            if not self._initialized:
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.executescript(SCHEMA)
+                self._initialized = True
+            yield connection
+        finally:
+            connection.close()
+
+    def _link(self, ref_id: str, digest: str):
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO pdf_refs (id, digest, created_at) VALUES (?, ?, ?)",
+                (ref_id, digest, time.time())
+            )
+
+    def _resolve(self, ref_id: str) -> Optional[str]:
+        with self._connect() as connection:
+            row = connection.execute("SELECT digest FROM pdf_refs WHERE id = ?", (ref_id,)).fetchone()
+            return row['digest'] if row else None
+
+    def _write(self, digest: str, data: bytes):
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as pdf_file:
+                pdf_file.write(data)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _register(self, digest: str) -> int:
+        size = os.path.getsize(self.path(digest))
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO pdf_objects (digest, size, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (digest, size, now, now)
+            )
+            return connection.execute("SELECT COALESCE(SUM(size), 0) FROM pdf_objects").fetchone()[0]
+
+    def _touch(self, digest: str):
+        now = time.time()
+        with self._connect() as connection:
+            updated = connection.execute(
+                "UPDATE pdf_objects SET last_access = ? WHERE digest = ? AND last_access < ?",
+                (now, digest, now - TOUCH_RESOLUTION)
+            ).rowcount
+            if not updated and os.path.exists(self.path(digest)):
+                # Written but never registered (e.g. the worker died right after rendering)
+                connection.execute(
+                    "INSERT OR IGNORE INTO pdf_objects (digest, size, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (digest, os.path.getsize(self.path(digest)), now, now)
+                )
+
+    def _evict(self) -> int:
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                victims = []
+                if self.ttl > 0:
+                    victims = [row['digest'] for row in connection.execute(
+                        "SELECT digest FROM pdf_objects WHERE last_access < ?", (now - self.ttl,)
+                    )]
+
+                total = connection.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM pdf_objects WHERE last_access >= ?",
+                    (now - self.ttl if self.ttl > 0 else 0,)
+                ).fetchone()[0]
+                if total > self.max_bytes:
+                    target = self.max_bytes * self.low_water
+                    expired = set(victims)
+                    for row in connection.execute("SELECT digest, size FROM pdf_objects ORDER BY last_access"):
+                        if total <= target:
+                            break
+                        if row['digest'] not in expired:
+                            victims.append(row['digest'])
+                            total -= row['size']
+
+                for digest in victims:
+                    # Refs are kept: a later request re-renders from the job's inputs
+                    connection.execute("DELETE FROM pdf_objects WHERE digest = ?", (digest,))
+                if self.ref_ttl > 0:
+                    connection.execute(
+                        "DELETE FROM pdf_refs WHERE created_at < ? "
+                        "AND digest NOT IN (SELECT digest FROM pdf_objects)",
+                        (now - self.ref_ttl,)
+                    )
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+
+        for digest in victims:
+            try:
+                os.remove(self.path(digest))
+            except FileNotFoundError:
+                pass
+        return len(victims)
+
+    def _counts(self):
+        with self._connect() as connection:
+            refs = connection.execute(
+                "SELECT COUNT(*) AS refs, COUNT(DISTINCT digest) AS digests FROM pdf_refs"
+            ).fetchone()
+            objects = connection.execute(
+                "SELECT COUNT(*) AS files, COALESCE(SUM(size), 0) AS total FROM pdf_objects"
+            ).fetchone()
+            return refs['refs'], refs['digests'], objects['files'], objects['total']
@@ -0,0 +1,178 @@
+"""
+BarakahTool Enterprise PDF Render Pool
+Runs ReportLab document builds in worker processes, off the event loop
+"""
+
+import asyncio
+import io
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Tuple
+
+from decouple import config
+
+# One generator per worker process, created by the pool initializer
+_worker_generator = None
+
+def _init_worker():
+    global _worker_generator
+    from pdf.enterprise_pdf_generator import EnterprisePDFGenerator
+    _worker_generator = EnterprisePDFGenerator()
+
+def _warm_up() -> bool:
+    """No-op task that forces a worker (and its initializer) to start"""
+    return _worker_generator is not None
+
+def _renderer(kind: str):
+    if _worker_generator is None:
+        _init_worker()
+    if kind == 'dua':
+        return _worker_generator.render_enterprise_pdf
+    if kind == 'collection':
+        return _worker_generator.render_collection_pdf
+    raise ValueError(f"Unknown render kind: {kind}")
+
+def _render(kind: str, payload: dict) -> bool:
+    """
+    Entry point executed inside a worker. The PDF is written to a temporary
+    file and renamed into place, so readers never see a half-written file.
+    A fallback render (False) is discarded and never replaces the output.
+    """
+    render = _renderer(kind)
+    output_path = payload['output_path']
+    temp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        ok = render(**{**payload, 'output_path': temp_path})
+        if ok:
+            os.replace(temp_path, output_path)
+        return ok
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def _render_bytes(kind: str, payload: dict) -> Tuple[bool, bytes]:
+    """
+    Entry point executed inside a worker: render into memory instead of a
+    file. Returns (ok, bytes); ok is False for the simplified fallback layout.
+    """
+    render = _renderer(kind)
+    buffer = io.BytesIO()
+    ok = render(**{**payload, 'output_path': buffer})
+    return ok, buffer.getvalue()
+
+class RenderQueueFull(Exception):
+    """Raised when too many renders are already queued"""
+
+class PDFRenderPool:
+    def __init__(self):
+        """
+        Initialize the render pool. PDF_RENDER_WORKERS=0 renders on a single
+        background thread instead of processes (useful for development).
+        """
+        self.workers = config('PDF_RENDER_WORKERS', default=2, cast=int)
+        self.max_pending = config('PDF_RENDER_MAX_PENDING', default=64, cast=int)
+        self.start_method = config('PDF_RENDER_START_METHOD', default='spawn')
+        self.history_size = config('PDF_RENDER_HISTORY', default=1000, cast=int)
+
+        self._executor = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.jobs: 'OrderedDict[str, Dict]' = OrderedDict()
+        self.pending = 0
+
+    @property
+    def saturated(self) -> bool:
+        """Whether new jobs would be rejected"""
+        return self.pending >= self.max_pending
+
+    async def render(self, job_id: str, kind: str, payload: dict) -> bool:
+        """
+        Render a PDF in the pool. At most `workers` renders run at once;
+        waiting jobs stay 'queued', and beyond max_pending they are refused.
+        """
+        return await self._run(job_id, kind, _render, payload)
+
+    async def render_bytes(self, job_id: str, kind: str, payload: dict) -> Tuple[bool, bytes]:
+        """Render a PDF in the pool and return (ok, bytes) (payload has no output_path)"""
+        return await self._run(job_id, kind, _render_bytes, payload)
+
+    async def _run(self, job_id: str, kind: str, target: Callable, payload: dict):
+        job = self._track(job_id, kind)
+        if self.saturated:
+            job['status'] = 'rejected'
+            job['error'] = 'PDF render queue is full'
+            raise RenderQueueFull(f"{self.pending} PDF renders already pending")
+
+        self.pending += 1
+        try:
+            async with self._get_slots():
+                job['status'] = 'running'
+                job['started_at'] = time.time()
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._get_executor(), target, kind, payload)
+
+            ok = result[0] if isinstance(result, tuple) else result
+            job['status'] = 'done' if ok else 'failed'
+            return result
+
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+            if isinstance(e, BrokenProcessPool):
+                # A worker died (e.g. OOM); start a fresh pool for later jobs
+                self.shutdown()
+            raise
+
+        finally:
+            self.pending -= 1
+            job['finished_at'] = time.time()
+
+    def start(self):
+        """Spawn workers ahead of the first request so it doesn't pay for imports"""
+        executor = self._get_executor()
+        for _ in range(max(self.workers, 1)):
+            executor.submit(_warm_up)
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Status and timings of a recent job"""
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    def stats(self) -> Dict:
+        return {'workers': self.workers, 'pending': self.pending, 'max_pending': self.max_pending}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _track(self, job_id: str, kind: str) -> Dict:
+        job = {'id': job_id, 'kind': kind, 'status': 'queued', 'queued_at': time.time(),
+               'started_at': None, 'finished_at': None, 'error': None}
+        self.jobs[job_id] = job
+        self.jobs.move_to_end(job_id)
+        while len(self.jobs) > self.history_size:
+            self.jobs.popitem(last=False)
+        return job
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(self.workers, 1))
+        return self._slots
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.workers > 0:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pdf-render')
+        return self._executor
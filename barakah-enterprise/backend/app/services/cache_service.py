@@ -0,0 +1,167 @@
+"""
+BarakahTool Enterprise Cache Service
+Non-blocking Redis caching built on redis.asyncio
+"""
+
+import asyncio
+import json
+import secrets
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError, ResponseError
+from decouple import config
+
+# Delete a lock only if we still own it
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class CacheService:
+    def __init__(self):
+        """Initialize the async Redis connection pool from REDIS_URL"""
+        self.redis_url = config('REDIS_URL', default='redis://localhost:6379/0')
+        self.timeout = config('REDIS_TIMEOUT', default=0.25, cast=float)
+        self.retry_after = config('REDIS_RETRY_AFTER', default=15.0, cast=float)
+        self.default_ttl = config('CACHE_TTL', default=3600, cast=int)
+
+        # Connections are opened lazily, so building the pool never blocks
+        self.pool = aioredis.ConnectionPool.from_url(
+            self.redis_url,
+            max_connections=config('REDIS_MAX_CONNECTIONS', default=50, cast=int),
+            socket_timeout=self.timeout,
+            socket_connect_timeout=self.timeout,
+            decode_responses=True
+        )
+        self.client = aioredis.Redis(connection_pool=self.pool)
+
+        # While Redis is down we skip it entirely until this monotonic deadline
+        self._unavailable_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        """Whether Redis is currently considered reachable"""
+        return time.monotonic() >= self._unavailable_until
+
+    async def get(self, key: str) -> Optional[str]:
+        """Get a raw value, or None on miss or when Redis is unavailable"""
+        return await self._call(lambda: self.client.get(key), default=None)
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
+        """Set a raw value with expiry; returns False if Redis is unavailable"""
+        result = await self._call(
+            lambda: self.client.set(key, value, ex=ttl or self.default_ttl),
+            default=False
+        )
+        return bool(result)
+
+    async def get_json(self, key: str) -> Optional[Any]:
+        """Get and decode a JSON value"""
+        return self._decode(await self.get(key))
+
+    async def set_json(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Encode and set a JSON value"""
+        return await self.set(key, json.dumps(value, default=str), ttl)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        """Fetch several JSON values in a single pipelined round-trip"""
+        if not keys:
+            return []
+
+        async def run():
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.get(key)
+                return await pipe.execute()
+
+        values = await self._call(run, default=None)
+        if values is None:
+            return [None] * len(keys)
+        return [self._decode(value) for value in values]
+
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Store several JSON values in a single pipelined round-trip"""
+        if not items:
+            return True
+
+        async def run():
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, json.dumps(value, default=str), ex=ttl or self.default_ttl)
+                return await pipe.execute()
+
+        result = await self._call(run, default=None)
+        return result is not None
+
+    async def acquire_lock(self, name: str, ttl: float) -> Tuple[bool, Optional[str]]:
+        """
+        Try to take a cross-worker lock. Returns (acquired, token). When Redis
+        is unavailable the caller is told it holds the lock with no token, so
+        work proceeds locally without coordination.
+        """
+        token = secrets.token_hex(16)
+        result = await self._call(
+            lambda: self.client.set(f"lock:{name}", token, nx=True, px=int(ttl * 1000)),
+            default=None
+        )
+        if result is None and not self.available:
+            return True, None
+        return bool(result), token if result else None
+
+    async def release_lock(self, name: str, token: Optional[str]):
+        """Release a lock taken with acquire_lock"""
+        if token:
+            await self._call(
+                lambda: self.client.eval(RELEASE_LOCK_SCRIPT, 1, f"lock:{name}", token),
+                default=None
+            )
+
+    async def lock_held(self, name: str) -> bool:
+        """Whether another worker currently holds the named lock"""
+        return bool(await self._call(lambda: self.client.exists(f"lock:{name}"), default=0))
+
+    async def ping(self) -> bool:
+        """Check connectivity, bypassing the degraded-mode skip"""
+        self._unavailable_until = 0.0
+        return bool(await self._call(self.client.ping, default=False))
+
+    async def close(self):
+        """Release all pooled connections"""
+        try:
+            await self.client.aclose()
+            await self.pool.disconnect()
+        except Exception as e:
+            print(f"Cache shutdown error: {str(e)}")
+
+    async def _call(self, operation, default=None):
+        """
+        Run a Redis operation under a hard deadline. Any failure marks Redis
+        as unavailable for a short period so requests never queue behind it.
+        """
+        if not self.available:
+            return default
+
+        try:
+            return await asyncio.wait_for(operation(), timeout=self.timeout)
+        except ResponseError as e:
+            # The server answered; the command itself was rejected
+            print(f"Cache command error: {str(e)}")
+            return default
+        except (RedisError, OSError, asyncio.TimeoutError) as e:
+            self._unavailable_until = time.monotonic() + self.retry_after
+            print(f"Cache unavailable, degrading for {self.retry_after:.0f}s: {type(e).__name__}: {str(e)}")
+            return default
+
+    @staticmethod
+    def _decode(value: Optional[str]) -> Optional[Any]:
+        """Decode a cached JSON payload, treating corrupt entries as misses"""
+        if value is None:
+            return None
+        try:
+            return json.loads(value)
+        except (TypeError, ValueError):
+            return None
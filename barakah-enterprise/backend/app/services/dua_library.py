@@ -0,0 +1,139 @@
+"""
+BarakahTool Enterprise Dua Library
+Offline corpus of authentic duas with a precomputed keyword index
+
+Rebuild the index after editing data/dua_library.json (run from app/):
+    python -m services.dua_library --rebuild-index
+"""
+
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from decouple import config
+
+from services.text_utils import normalize_situation, stem
+
+LIBRARY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'dua_library.json')
+
+# Index weights: naming the category outright beats a related keyword, and
+# one specific keyword is enough to reach the default DUA_LIBRARY_MIN_SCORE
+CATEGORY_WEIGHT = 3.0
+DUA_KEYWORD_WEIGHT = 2.5
+KEYWORD_WEIGHT = 2.0
+WEAK_KEYWORD_WEIGHT = 0.5
+
+# Category keywords too ambiguous to pick a dua on their own ("I lost my job")
+WEAK_KEYWORDS = frozenset({'job', 'work', 'life', 'hard', 'good'})
+
+class DuaLibrary:
+    def __init__(self, path: str = LIBRARY_PATH):
+        """Load the corpus and its inverted index"""
+        self.enabled = config('DUA_LIBRARY_ENABLED', default=True, cast=bool)
+        self.min_score = config('DUA_LIBRARY_MIN_SCORE', default=2.0, cast=float)
+
+        with open(path, encoding='utf-8') as library_file:
+            data = json.load(library_file)
+
+        self.duas = data['duas']
+        self.categories = data['categories']
+        self.index = data.get('index') or self.build_index(data)
+        self.general = next(
+            (i for i, dua in enumerate(self.duas) if dua['category'] == 'general'), 0
+        )
+
+    @staticmethod
+    def build_index(data: Dict) -> Dict[str, List[List]]:
+        """Map each stemmed keyword to [[dua position, weight], ...]"""
+        weights = defaultdict(dict)
+
+        weak = {stem(word) for word in WEAK_KEYWORDS}
+
+        def add(term: str, position: int, weight: float):
+            for word in normalize_situation(term).split():
+                token = stem(word)
+                weights[token][position] = max(weights[token].get(position, 0.0), weight)
+
+        for position, dua in enumerate(data['duas']):
+            add(dua['category'], position, CATEGORY_WEIGHT)
+            for keyword in data['categories'].get(dua['category'], []):
+                weight = WEAK_KEYWORD_WEIGHT if stem(keyword) in weak else KEYWORD_WEIGHT
+                add(keyword, position, weight)
+            for keyword in dua.get('keywords', []):
+                add(keyword, position, DUA_KEYWORD_WEIGHT)
+
+        return {
+            token: sorted([position, weight] for position, weight in postings.items())
+            for token, postings in sorted(weights.items())
+        }
+
+    def match(self, situation: str, language: str) -> Optional[Dict]:
+        """
+        Library dua for a situation, or None if nothing scores at least
+        min_score or the dua has no translation in the requested language.
+        Weak keywords alone never reach min_score.
+        """
+        if not self.enabled:
+            return None
+
+        position, score = self._best(situation)
+        if position is None or score < self.min_score:
+            return None
+
+        return self._as_dua(self.duas[position], language, strict=True)
+
+    def fallback(self, situation: str, language: str) -> Dict:
+        """Closest library dua for any situation, in English if not translated"""
+        position, _ = self._best(situation)
+        if position is None:
+            position = self.general
+        return self._as_dua(self.duas[position], language, strict=False)
+
+    def _best(self, situation: str):
+        """Highest scoring dua position and its score; earlier entries break ties"""
+        scores = defaultdict(float)
+        for token in {stem(word) for word in normalize_situation(situation).split()}:
+            for position, weight in self.index.get(token, ()):
+                scores[position] += weight
+
+        if not scores:
+            return None, 0.0
+
+        position = min(scores, key=lambda p: (-scores[p], p))
+        return position, scores[position]
+
+    def _as_dua(self, entry: Dict, language: str, strict: bool) -> Optional[Dict]:
+        translations = entry['translations']
+        translation = translations.get((language or '').strip().casefold())
+        if translation is None:
+            if strict:
+                return None
+            translation = translations['english']
+
+        return {
+            'arabic': entry['arabic'],
+            'transliteration': entry['transliteration'],
+            'translation': translation,
+            'language': language,
+            'quranic_reference': entry.get('reference'),
+            'category': entry['category'],
+            'source': 'library'
+        }
+
+def rebuild_index(path: str = LIBRARY_PATH):
+    """Recompute the inverted index and write it back into the data file"""
+    with open(path, encoding='utf-8') as library_file:
+        data = json.load(library_file)
+
+    data['index'] = DuaLibrary.build_index(data)
+
+    with open(path, 'w', encoding='utf-8') as library_file:
+        json.dump(data, library_file, ensure_ascii=False, separators=(',', ':'))
+
+    print(f"Indexed {len(data['duas'])} duas under {len(data['index'])} keywords: {path}")
+
+if __name__ == "__main__":
+    if '--rebuild-index' in sys.argv:
+        rebuild_index()
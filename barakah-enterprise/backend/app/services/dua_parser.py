@@ -0,0 +1,170 @@
+"""
+BarakahTool Enterprise Dua Parser
+Parsing of LLM dua completions into labelled sections
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# Any bold label ending in a colon: "**Arabic:**", "**Best Times**:", ...
+LABEL_RE = re.compile(r'\*\*([^*\n:]{1,60})(?::[ \t]*\*\*|\*\*[ \t]*:)')
+
+# Runs of Arabic script, allowing spaces between words
+ARABIC_LETTERS = r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]+'
+ARABIC_RUN_RE = re.compile(rf'{ARABIC_LETTERS}(?:[ \t]+{ARABIC_LETTERS})*')
+
+FALLBACK_ARABIC = "رَبَّنَا آتِنَا فِي الدُّنْيَا حَسَنَةً وَفِي الْآخِرَةِ حَسَنَةً وَقِنَا عَذَابَ النَّارِ"
+
+# Core fields stop at the first blank line, as the model pads them with commentary
+CORE_FIELDS = ('arabic', 'transliteration', 'translation')
+
+# Label prefix -> structured field, checked in order
+FIELD_PREFIXES = (
+    ('arabic', 'arabic'),
+    ('transliteration', 'transliteration'),
+    ('pronunciation', 'transliteration'),
+    ('translation', 'translation'),
+    ('quranic', 'quranic_reference'),
+    ('reference', 'quranic_reference'),
+    ('source', 'quranic_reference'),
+    ('best time', 'timing'),
+    ('timing', 'timing'),
+    ('recommended time', 'timing'),
+    ('when to recite', 'timing'),
+    ('spiritual context', 'context'),
+    ('context', 'context'),
+    ('variation', 'variations'),
+    ('related dua', 'variations'),
+    ('additional dua', 'variations'),
+)
+
+def clean_section(text: str) -> str:
+    """Drop markdown emphasis and collapse whitespace"""
+    if not text:
+        return ""
+    return ' '.join(text.replace('*', '').split())
+
+@lru_cache(maxsize=256)
+def field_for_label(label: str) -> Optional[str]:
+    """Map a bold section label to a structured field name"""
+    label = label.strip().lower()
+    for prefix, field in FIELD_PREFIXES:
+        if label.startswith(prefix):
+            return field
+    return None
+
+def extract_arabic_fallback(content: str) -> str:
+    """Longest run of Arabic script, for completions that ignore the format"""
+    runs = ARABIC_RUN_RE.findall(content)
+    return max(runs, key=len) if runs else FALLBACK_ARABIC
+
+def parse_dua_response(content: str, language: str) -> Dict:
+    """
+    Split a completion into labelled sections in a single scan over its bold
+    labels. The first occurrence of each field wins; premium extras such as
+    Quranic references and timing recommendations become their own fields.
+    """
+    content = content or ""
+    sections: Dict[str, str] = {}
+    labels = list(LABEL_RE.finditer(content))
+
+    for position, label in enumerate(labels):
+        field = field_for_label(label.group(1))
+        if field is None or field in sections:
+            continue
+
+        end = labels[position + 1].start() if position + 1 < len(labels) else len(content)
+        body = content[label.end():end].lstrip()
+        if field in CORE_FIELDS:
+            body = body.split('\n\n', 1)[0]
+        sections[field] = clean_section(body)
+
+    if 'arabic' not in sections and 'translation' not in sections:
+        # Unstructured reply: salvage what we can
+        return {
+            'arabic': extract_arabic_fallback(content),
+            'transliteration': '',
+            'translation': content[:200] + '...' if len(content) > 200 else content,
+            'language': language,
+            'source': 'ai_generated'
+        }
+
+    parsed = {
+        'arabic': sections.pop('arabic', ''),
+        'transliteration': sections.pop('transliteration', ''),
+        'translation': sections.pop('translation', ''),
+        'language': language,
+        'source': 'ai_generated'
+    }
+    parsed.update(sections)
+    return parsed
+
+class IncrementalDuaParser:
+    """
+    Parse a streamed completion chunk by chunk, emitting each core section
+    as soon as its end is visible instead of waiting for the whole response.
+    Labels and section boundaries are those of parse_dua_response: a section
+    ends at the next bold label or at a blank line.
+    """
+
+    # Enough trailing text to hold a partially received label
+    LABEL_TAIL = 80
+
+    def __init__(self, clean=clean_section):
+        self.clean = clean
+        self.content = ''
+        self._buffer = ''
+        self._section = None
+        self._emitted = set()
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Add streamed text; returns (section, text) pairs completed by it"""
+        if not chunk:
+            return []
+        self.content += chunk
+        self._buffer += chunk
+        return self._drain(final=False)
+
+    def finish(self) -> List[Tuple[str, str]]:
+        """Flush the last open section once the stream has ended"""
+        return self._drain(final=True)
+
+    def _drain(self, final: bool) -> List[Tuple[str, str]]:
+        sections = []
+
+        while True:
+            if self._section is None:
+                match = LABEL_RE.search(self._buffer)
+                if not match:
+                    self._buffer = self._buffer[-self.LABEL_TAIL:]
+                    break
+                # Text under other labels (references, timing, ...) is not streamed
+                field = field_for_label(match.group(1))
+                self._section = field if field in CORE_FIELDS else None
+                self._buffer = self._buffer[match.end():]
+                continue
+
+            # Section text starts after any leading whitespace
+            start = len(self._buffer) - len(self._buffer.lstrip())
+            ends = [position for position in (
+                self._buffer.find('\n\n', start),
+                next((label.start() for label in LABEL_RE.finditer(self._buffer, start)), -1)
+            ) if position >= 0]
+            if not ends and not final:
+                break
+
+            cut = min(ends) if ends else len(self._buffer)
+            text = self.clean(self._buffer[start:cut])
+            self._buffer = self._buffer[cut:]
+
+            # Only the first occurrence of a section counts, as in the batch parser
+            if self._section not in self._emitted:
+                self._emitted.add(self._section)
+                sections.append((self._section, text))
+            self._section = None
+
+            if not ends:
+                break
+
+        return sections
@@ -3,51 +3,166 @@ BarakahTool Enterprise Dua Service
 Professional AI-powered Islamic content generation
 """
 
-import openai
 import os
-from typing import Dict, Optional
-import re
-from decouple import config
+import hashlib
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, Optional
+
+from services.text_utils import normalize_situation
+from services.semantic_cache import SemanticDuaCache
+from services.dua_library import DuaLibrary
+from services.dua_parser import IncrementalDuaParser, parse_dua_response
+from services.openai_client import ResilientOpenAIClient, CircuitOpenError
+
+# Bump when parsing or prompt semantics change in a way the prompt text alone doesn't capture
+PROMPT_VERSION = 2
 
 class DuaService:
     def __init__(self):
         """Initialize the Dua service with OpenAI"""
-        self.client = openai.AsyncOpenAI(
-            api_key=config('OPENAI_API_KEY', default='')
-        )
+        self.client = ResilientOpenAIClient()
         self.model = "gpt-4-turbo-preview"
+        self.cache_version = self._compute_cache_version()
+        self.semantic_cache = SemanticDuaCache()
+        self.library = DuaLibrary()
+    
+    def cache_key(self, situation: str, language: str) -> str:
+        """
+        Stable cache key shared by every worker and across restarts.
+        Changing the model or prompts changes the version prefix, so stale
+        entries are never read again and simply expire.
+        """
+        payload = '\x1f'.join([normalize_situation(situation), language.strip().casefold()])
+        digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        return f"dua:{self.cache_version}:{digest}"
+    
+    def _compute_cache_version(self) -> str:
+        """Fingerprint of everything that shapes a generated dua"""
+        fingerprint = '\x1f'.join([
+            str(PROMPT_VERSION),
+            self.model,
+            self._create_system_prompt(premium=False),
+            self._create_user_prompt('{situation}', '{language}', premium=False)
+        ])
+        return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:12]
     
     async def generate_dua(self, situation: str, language: str = "English", premium: bool = False) -> Dict:
         """
         Generate authentic Islamic dua using advanced AI
         """
+        # Serve basic requests from the library or previously generated duas
+        cached_dua = self._lookup_offline(situation, language, premium)
+        if cached_dua:
+            return cached_dua
+        
         try:
-            # Create enhanced prompt for premium users
-            system_prompt = self._create_system_prompt(premium)
-            user_prompt = self._create_user_prompt(situation, language, premium)
-            
             # Generate dua using OpenAI
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1500 if premium else 800
+            response = await self.client.chat_completion(
+                **self._completion_params(situation, language, premium)
             )
             
             # Parse the response
             content = response.choices[0].message.content
             parsed_dua = self._parse_dua_response(content, language)
+            self._remember(situation, language, premium, parsed_dua)
             
             return parsed_dua
             
+        except CircuitOpenError:
+            # OpenAI is degraded; answer immediately instead of queueing behind it
+            return self._get_fallback_dua(situation, language)
+            
         except Exception as e:
             print(f"Dua generation error: {str(e)}")
             # Return fallback dua
             return self._get_fallback_dua(situation, language)
     
+    async def stream_dua(self, situation: str, language: str = "English", premium: bool = False) -> AsyncIterator[Dict]:
+        """
+        Stream a dua as it is generated. Yields {'event': 'section', ...} for
+        each of arabic/transliteration/translation as soon as it is complete,
+        then a single {'event': 'complete', 'dua': ...} with the full result.
+        A failure before any section yields a fallback dua; one after sections
+        went out yields {'event': 'error', ...} and ends the stream, so a
+        client never gets parts of two different duas.
+        """
+        cached_dua = self._lookup_offline(situation, language, premium)
+        if cached_dua:
+            for name in ('arabic', 'transliteration', 'translation'):
+                yield {'event': 'section', 'section': name, 'text': cached_dua.get(name, '')}
+            yield {'event': 'complete', 'dua': cached_dua}
+            return
+        
+        parser = IncrementalDuaParser()
+        sent_sections = False
+        try:
+            stream = await self.client.chat_completion(
+                **self._completion_params(situation, language, premium),
+                stream=True
+            )
+            
+            async with aclosing(stream):
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    for name, text in parser.feed(chunk.choices[0].delta.content or ''):
+                        sent_sections = True
+                        yield {'event': 'section', 'section': name, 'text': text}
+            
+            for name, text in parser.finish():
+                sent_sections = True
+                yield {'event': 'section', 'section': name, 'text': text}
+            
+            # The full parse stays authoritative for what gets cached and rendered
+            parsed_dua = self._parse_dua_response(parser.content, language)
+            self._remember(situation, language, premium, parsed_dua)
+            
+        except Exception as e:
+            print(f"Dua streaming error: {str(e)}")
+            if sent_sections:
+                yield {'event': 'error', 'detail': f"Dua generation failed: {str(e)}"}
+                return
+            parsed_dua = self._get_fallback_dua(situation, language)
+            yield {'event': 'fallback', 'dua': parsed_dua}
+        
+        yield {'event': 'complete', 'dua': parsed_dua}
+    
+    def _completion_params(self, situation: str, language: str, premium: bool) -> Dict:
+        """Chat completion arguments shared by the batch and streaming paths"""
+        # Create enhanced prompt for premium users
+        system_prompt = self._create_system_prompt(premium)
+        user_prompt = self._create_user_prompt(situation, language, premium)
+        
+        return {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            'temperature': 0.7,
+            'max_tokens': 1500 if premium else 800
+        }
+    
+    def _lookup_offline(self, situation: str, language: str, premium: bool) -> Optional[Dict]:
+        """Library and semantic cache lookup for basic requests"""
+        if premium:
+            return None
+        library_dua = self.library.match(situation, language)
+        if library_dua:
+            return library_dua
+        match = self.semantic_cache.lookup(situation, language)
+        if not match:
+            return None
+        cached_dua, similarity = match
+        cached_dua['source'] = 'semantic_cache'
+        cached_dua['similarity'] = round(similarity, 3)
+        return cached_dua
+    
+    def _remember(self, situation: str, language: str, premium: bool, parsed_dua: Dict):
+        """Index a freshly generated basic dua for semantic reuse"""
+        if not premium and parsed_dua.get('arabic') and parsed_dua.get('translation'):
+            self.semantic_cache.add(situation, language, parsed_dua)
+    
     def _create_system_prompt(self, premium: bool = False) -> str:
         """Create system prompt for AI"""
         base_prompt = """You are an expert Islamic scholar and dua generator specializing in authentic Islamic supplications from the Quran and Sunnah.
@@ -111,100 +226,23 @@ PREMIUM REQUEST: Please provide enhanced content with:
     
     def _parse_dua_response(self, content: str, language: str) -> Dict:
         """Parse the AI response into structured data"""
-        try:
-            # Extract Arabic text
-            arabic_match = re.search(r'\*\*Arabic:\*\*\s*(.*?)(?=\n\*\*|\n\n|$)', content, re.DOTALL | re.IGNORECASE)
-            arabic_text = arabic_match.group(1).strip() if arabic_match else ""
-            
-            # Extract transliteration
-            transliteration_match = re.search(r'\*\*Transliteration:\*\*\s*(.*?)(?=\n\*\*|\n\n|$)', content, re.DOTALL | re.IGNORECASE)
-            transliteration = transliteration_match.group(1).strip() if transliteration_match else ""
-            
-            # Extract translation
-            translation_pattern = rf'\*\*Translation.*?:\*\*\s*(.*?)(?=\n\*\*|\n\n|$)'
-            translation_match = re.search(translation_pattern, content, re.DOTALL | re.IGNORECASE)
-            translation = translation_match.group(1).strip() if translation_match else ""
-            
-            # Clean up the extracted text
-            arabic_text = self._clean_text(arabic_text)
-            transliteration = self._clean_text(transliteration)
-            translation = self._clean_text(translation)
-            
-            return {
-                'arabic': arabic_text,
-                'transliteration': transliteration,
-                'translation': translation,
-                'language': language,
-                'source': 'ai_generated'
-            }
-            
-        except Exception as e:
-            print(f"Parsing error: {str(e)}")
-            # Return basic parsed content
-            return {
-                'arabic': self._extract_arabic_fallback(content),
-                'transliteration': '',
-                'translation': content[:200] + '...' if len(content) > 200 else content,
-                'language': language,
-                'source': 'ai_generated'
-            }
-    
-    def _clean_text(self, text: str) -> str:
-        """Clean and format text"""
-        if not text:
-            return ""
-        
-        # Remove extra whitespace and newlines
-        text = re.sub(r'\n+', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
-        
-        # Remove any remaining markdown formatting
-        text = re.sub(r'\*\*', '', text)
-        text = re.sub(r'\*', '', text)
-        
-        return text
-    
-    def _extract_arabic_fallback(self, content: str) -> str:
-        """Fallback method to extract Arabic text"""
-        # Look for Arabic characters
-        arabic_pattern = r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]+'
-        arabic_matches = re.findall(arabic_pattern, content)
-        
-        if arabic_matches:
-            # Return the longest Arabic match
-            return max(arabic_matches, key=len)
-        
-        return "رَبَّنَا آتِنَا فِي الدُّنْيَا حَسَنَةً وَفِي الْآخِرَةِ حَسَنَةً وَقِنَا عَذَابَ النَّارِ"  # Fallback dua
+        return parse_dua_response(content, language)
     
     def _get_fallback_dua(self, situation: str, language: str) -> Dict:
         """Return a fallback dua when AI generation fails"""
-        fallback_duas = {
-            'general': {
-                'arabic': 'رَبَّنَا آتِنَا فِي الدُّنْيَا حَسَنَةً وَفِي الْآخِرَةِ حَسَنَةً وَقِنَا عَذَابَ النَّارِ',
-                'transliteration': 'Rabbana atina fi\'d-dunya hasanatan wa fi\'l-akhirati hasanatan wa qina azab an-nar',
-                'translation': 'Our Lord, grant us good in this world and good in the Hereafter, and protect us from the punishment of the Fire.'
-            },
-            'success': {
-                'arabic': 'اللَّهُمَّ أَعِنِّي وَلَا تُعِنْ عَلَيَّ وَانْصُرْنِي وَلَا تَنْصُرْ عَلَيَّ',
-                'transliteration': 'Allahumma a\'inni wa la tu\'in alayya, wansurni wa la tansur alayya',
-                'translation': 'O Allah, help me and do not help against me, support me and do not support against me.'
-            }
-        }
-        
-        # Choose appropriate fallback
-        if any(word in situation.lower() for word in ['success', 'work', 'business', 'job']):
-            selected_dua = fallback_duas['success']
-        else:
-            selected_dua = fallback_duas['general']
-        
-        return {
-            'arabic': selected_dua['arabic'],
-            'transliteration': selected_dua['transliteration'],
-            'translation': selected_dua['translation'],
-            'language': language,
-            'source': 'fallback'
-        }
+        fallback_dua = self.library.fallback(situation, language)
+        fallback_dua['source'] = 'fallback'
+        return fallback_dua
+
+def dua_from_cache(entry: Dict) -> Dict:
+    """
+    Dua data from a cached response (a DuaResponse dict without its id).
+    Every field passes through, so the Quranic reference and premium extras
+    survive whichever endpoint filled the cache.
+    """
+    dua_data = {key: value for key, value in entry.items() if key != 'arabic_text'}
+    dua_data['arabic'] = entry['arabic_text']
+    return dua_data
 
 # Create singleton instance
 dua_service = DuaService()
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""
+BarakahTool Enterprise File Responses
+Conditional, range-capable file serving with zero-copy send when available
+"""
+
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import anyio
+from decouple import config
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+# ASGI extension servers advertise when they can sendfile() on our behalf
+ZEROCOPY_EXTENSION = 'http.response.zerocopysend'
+
+class RangeFileResponse(FileResponse):
+    """
+    FileResponse that can send a single byte range, and hands the file
+    descriptor to the server when it supports zero-copy send. Otherwise the
+    file is read in fixed-size chunks on a worker thread.
+    """
+
+    chunk_size = config('FILE_CHUNK_SIZE', default=64 * 1024, cast=int)
+
+    def __init__(self, path: str, stat_result: os.stat_result,
+                 byte_range: Optional[Tuple[int, int]] = None, **kwargs):
+        super().__init__(path, stat_result=stat_result, **kwargs)
+        size = stat_result.st_size
+        self.start, self.end = byte_range if byte_range else (0, size - 1)
+
+        if byte_range:
+            self.status_code = 206
+            self.headers['content-range'] = f"bytes {self.start}-{self.end}/{size}"
+            self.headers['content-length'] = str(self.end - self.start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            'type': 'http.response.start',
+            'status': self.status_code,
+            'headers': self.raw_headers
+        })
+
+        count = self.end - self.start + 1
+        if self.send_header_only or count <= 0:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        elif ZEROCOPY_EXTENSION in scope.get('extensions', {}):
+            with open(self.path, 'rb') as file:
+                await send({
+                    'type': ZEROCOPY_EXTENSION,
+                    'file': file,
+                    'offset': self.start,
+                    'count': count,
+                    'more_body': False
+                })
+        else:
+            async with await anyio.open_file(self.path, mode='rb') as file:
+                await file.seek(self.start)
+                remaining = count
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': remaining > 0
+                    })
+                if remaining > 0:
+                    # File shrank under us; close the response cleanly
+                    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+        if self.background is not None:
+            await self.background()
+
+def make_etag(stat_result: os.stat_result) -> str:
+    """Strong validator from modification time and size"""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+def is_not_modified(request: Request, etag: str, stat_result: os.stat_result) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or etag in tags
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(stat_result.st_mtime) <= since
+
+    return False
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=" range into inclusive (start, end). Returns None
+    when the header should be ignored (multiple ranges, other units, junk,
+    a last position before the first) and raises ValueError when a valid
+    range can't be satisfied (RFC 9110 section 14.1.1).
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+
+    first, sep, last = (part.strip() for part in spec.strip().partition('-'))
+    if not sep or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            # Syntactically invalid, not unsatisfiable: serve the whole file
+            return None
+    else:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        start, end = max(size - length, 0), size - 1
+
+    if start >= size:
+        raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+    return start, min(end, size - 1)
+
+async def serve_file(request: Request, path: str, media_type: str,
+                     filename: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Respond with a file, honouring conditional requests (304) and Range
+    (206/416). Raises FileNotFoundError if the path is not a regular file.
+    """
+    stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise FileNotFoundError(path)
+
+    etag = make_etag(stat_result)
+    validators = {
+        'etag': etag,
+        'last-modified': formatdate(stat_result.st_mtime, usegmt=True),
+        'accept-ranges': 'bytes',
+        **(headers or {})
+    }
+
+    if is_not_modified(request, etag, stat_result):
+        return Response(status_code=304, headers=validators)
+
+    byte_range = None
+    range_header = request.headers.get('range')
+    # If-Range: only resume when the client still has the same version
+    if range_header and request.headers.get('if-range', etag) in (etag, validators['last-modified']):
+        try:
+            byte_range = parse_range(range_header, stat_result.st_size)
+        except ValueError:
+            return Response(status_code=416, headers={
+                **validators,
+                'content-range': f"bytes */{stat_result.st_size}"
+            })
+
+    return RangeFileResponse(
+        path,
+        stat_result=stat_result,
+        byte_range=byte_range,
+        headers=validators,
+        media_type=media_type,
+        filename=filename,
+        method=request.method
+    )
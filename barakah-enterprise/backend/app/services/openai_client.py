@@ -0,0 +1,200 @@
+"""
+BarakahTool Enterprise OpenAI Client
+Pooled, deadline-bounded OpenAI access with retries and a circuit breaker
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+
+import httpx
+import openai
+from decouple import config
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling OpenAI while the circuit breaker is open"""
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """
+        Closed: calls flow. Open: calls are rejected until reset_timeout has
+        passed. Half-open: a single probe call decides whether to close again.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream right now"""
+        if self.state == 'open':
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = 'half_open'
+            self._probe_in_flight = False
+
+        if self.state == 'half_open':
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+
+        return True
+
+    def record_success(self):
+        self.state = 'closed'
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == 'half_open' or self.failures >= self.failure_threshold:
+            if self.state != 'open':
+                print(f"OpenAI circuit opened after {self.failures} failures")
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Free the half-open probe slot when the probe ended without a verdict"""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict:
+        return {'state': self.state, 'failures': self.failures}
+
+class ResilientOpenAIClient:
+    # Upstream conditions worth retrying; anything else is our own bad request
+    RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+    def __init__(self):
+        """Initialize a shared httpx pool and the OpenAI client on top of it"""
+        self.call_timeout = config('OPENAI_TIMEOUT', default=30.0, cast=float)
+        self.total_deadline = config('OPENAI_TOTAL_DEADLINE', default=45.0, cast=float)
+        self.max_retries = config('OPENAI_MAX_RETRIES', default=3, cast=int)
+        self.backoff_base = config('OPENAI_BACKOFF_BASE', default=0.5, cast=float)
+        self.backoff_cap = config('OPENAI_BACKOFF_CAP', default=8.0, cast=float)
+
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config('OPENAI_MAX_CONNECTIONS', default=100, cast=int),
+                max_keepalive_connections=config('OPENAI_MAX_KEEPALIVE', default=20, cast=int),
+                keepalive_expiry=30.0
+            ),
+            timeout=httpx.Timeout(self.call_timeout, connect=5.0, pool=5.0)
+        )
+        self.client = openai.AsyncOpenAI(
+            api_key=config('OPENAI_API_KEY', default=''),
+            # Point at a local stub server in tests, e.g. http://127.0.0.1:8089/v1
+            base_url=config('OPENAI_BASE_URL', default=None),
+            http_client=self.http_client,
+            max_retries=0,  # retries are handled here, with jitter and the breaker
+            timeout=self.call_timeout
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=config('OPENAI_BREAKER_THRESHOLD', default=5, cast=int),
+            reset_timeout=config('OPENAI_BREAKER_RESET', default=30.0, cast=float)
+        )
+        self.metrics = {'calls': 0, 'retries': 0, 'failures': 0, 'short_circuited': 0}
+
+    async def chat_completion(self, **params):
+        """
+        Create a chat completion, or open a stream with stream=True. A stream
+        settles the breaker when it ends, not when it opens: an error while it
+        is being read counts as a failure.
+        """
+        self.metrics['calls'] += 1
+        deadline = time.monotonic() + self.total_deadline
+        attempt = 0
+
+        while True:
+            if not self.breaker.allow():
+                self.metrics['short_circuited'] += 1
+                raise CircuitOpenError("OpenAI circuit breaker is open")
+
+            timeout = min(self.call_timeout, max(deadline - time.monotonic(), 0.1))
+            probe = self.breaker.state == 'half_open'
+            streaming = False
+            try:
+                response = await asyncio.wait_for(
+                    self.client.chat.completions.create(**params, timeout=timeout),
+                    timeout=timeout + 1.0
+                )
+                if params.get('stream'):
+                    streaming = True
+                    return self._settle_stream(response, probe)
+                self.breaker.record_success()
+                return response
+
+            except Exception as e:
+                if not self._is_retryable(e):
+                    # Our own bad request says nothing about the provider's health,
+                    # so it neither closes nor opens the breaker
+                    raise
+
+                # Each failed attempt counts toward opening the breaker
+                self.breaker.record_failure()
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                if (attempt > self.max_retries or self.breaker.state == 'open'
+                        or time.monotonic() + delay >= deadline):
+                    self.metrics['failures'] += 1
+                    raise
+
+                self.metrics['retries'] += 1
+                print(f"OpenAI call failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+            finally:
+                if probe and not streaming:
+                    # Success and failure settle the probe; a client error or a
+                    # cancelled one (e.g. an SSE client hanging up mid-call) must
+                    # still free the slot
+                    self.breaker.release_probe()
+
+    async def _settle_stream(self, stream, probe: bool):
+        """Relay a completion stream, recording its outcome once it has ended"""
+        try:
+            async for chunk in stream:
+                yield chunk
+            self.breaker.record_success()
+        except Exception:
+            self.breaker.record_failure()
+            self.metrics['failures'] += 1
+            raise
+        finally:
+            # A reader that stops early leaves no verdict, only a free probe slot
+            if probe:
+                self.breaker.release_probe()
+            await stream.response.aclose()
+
+    def stats(self) -> Dict:
+        return {**self.metrics, 'breaker': self.breaker.stats()}
+
+    async def close(self):
+        await self.http_client.aclose()
+
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in self.RETRYABLE_STATUS
+        return False
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when given"""
+        retry_after = self._retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, 'response', None)
+        if response is None:
+            return None
+        try:
+            return float(response.headers.get('retry-after'))
+        except (TypeError, ValueError):
+            return None
@@ -5,16 +5,41 @@ One-time payment processing with Stripe
 
 import stripe
 from decouple import config
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import os
+import sqlite3
+import time
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
 
+API_KEYS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS api_keys (
+    key_hash TEXT PRIMARY KEY,
+    plan TEXT NOT NULL,
+    user_email TEXT NOT NULL,
+    purchase_id TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
 class PaymentService:
     def __init__(self):
         """Initialize Stripe payment service"""
         stripe.api_key = config('STRIPE_SECRET_KEY', default='')
         self.webhook_secret = config('STRIPE_WEBHOOK_SECRET', default='')
         
+        # API keys allowed to call enterprise endpoints: comma-separated in env,
+        # plus keys issued on purchase, stored (hashed) in SQLite so every
+        # worker process sees them and they survive restarts
+        self.api_keys = {
+            key.strip() for key in config('ENTERPRISE_API_KEYS', default='').split(',') if key.strip()
+        }
+        self.api_keys_db = config('API_KEYS_DB', default='data/api_keys.sqlite3')
+        self._api_keys_initialized = False
+        
         # Pricing plans (in cents)
         self.plans = {
             'premium': {
@@ -104,7 +129,9 @@ class PaymentService:
                 # 3. Send welcome email with access details
                 # 4. Generate API keys for enterprise/whitelabel users
                 
-                access_details = self._create_user_access(plan, user_email, user_name, purchase_id)
+                access_details = await asyncio.to_thread(
+                    self._create_user_access, plan, user_email, user_name, purchase_id
+                )
                 
                 return {
                     'success': True,
@@ -159,7 +186,7 @@ class PaymentService:
                 'access_level': 'enterprise',
                 'commercial_rights': True,
                 'api_access': True,
-                'api_key': self._generate_api_key(user_email, purchase_id),
+                'api_key': self._generate_api_key(plan, user_email, purchase_id),
                 'white_label': False,
                 'expiry_date': None,
                 'features': [
@@ -180,7 +207,7 @@ class PaymentService:
                 'white_label': True,
                 'source_code_access': True,
                 'custom_domain': True,
-                'api_key': self._generate_api_key(user_email, purchase_id),
+                'api_key': self._generate_api_key(plan, user_email, purchase_id),
                 'admin_panel': True,
                 'expiry_date': None,
                 'features': [
@@ -195,20 +222,59 @@ class PaymentService:
         
         return base_access
     
-    def _generate_api_key(self, user_email: str, purchase_id: str) -> str:
+    def _generate_api_key(self, plan: str, user_email: str, purchase_id: str) -> str:
         """
         Generate API key for enterprise/whitelabel users
         """
-        import hashlib
         import secrets
         
         # Create unique API key
         key_data = f"{user_email}:{purchase_id}:{secrets.token_urlsafe(32)}"
         api_key = f"bt_{hashlib.md5(key_data.encode()).hexdigest()[:24]}"
         
-        # In a real app, you'd store this in database with permissions
+        # Only a hash is stored, so the database alone can't be used to call the API
+        with self._connect_api_keys() as connection:
+            connection.execute(
+                "INSERT INTO api_keys (key_hash, plan, user_email, purchase_id, created_at) VALUES (?, ?, ?, ?, ?)",
+                (self._hash_api_key(api_key), plan, user_email or '', purchase_id, time.time())
+            )
         return api_key
     
+    async def has_api_access(self, api_key: Optional[str]) -> bool:
+        """
+        Check whether an API key belongs to an enterprise/whitelabel plan
+        """
+        if not api_key:
+            return False
+        if api_key in self.api_keys:
+            return True
+        return await asyncio.to_thread(self._api_key_issued, api_key)
+    
+    @staticmethod
+    def _hash_api_key(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+    
+    @contextmanager
+    def _connect_api_keys(self):
+        if not self._api_keys_initialized:
+            os.makedirs(os.path.dirname(self.api_keys_db) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.api_keys_db, timeout=10.0, isolation_level=None)
+        try:
+            if not self._api_keys_initialized:
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.executescript(API_KEYS_SCHEMA)
+                self._api_keys_initialized = True
+            yield connection
+        finally:
+            connection.close()
+    
+    def _api_key_issued(self, api_key: str) -> bool:
+        with self._connect_api_keys() as connection:
+            row = connection.execute(
+                "SELECT 1 FROM api_keys WHERE key_hash = ?", (self._hash_api_key(api_key),)
+            ).fetchone()
+            return row is not None
+    
     async def verify_webhook(self, payload: bytes, sig_header: str) -> Dict:
         """
         Verify Stripe webhook signature and process event
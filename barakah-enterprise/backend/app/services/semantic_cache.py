@@ -0,0 +1,181 @@
+"""
+BarakahTool Enterprise Semantic Cache
+Offline similarity matching of situations so near-duplicate requests skip the LLM
+"""
+
+import math
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from decouple import config
+
+from services.text_utils import normalize_situation, stem
+
+# Words that carry no meaning for matching one situation to another
+STOPWORDS = frozenset("""
+a about am an and are as at be but by can do feel feeling for from get getting
+give go going have how i im in is it its me my myself need of on or our please
+really so some that the this to today us very was we what when with would you
+your dua duaa duas supplication supplications prayer make help
+""".split())
+
+class SemanticDuaCache:
+    def __init__(self):
+        """Initialize per-language nearest-neighbour indexes"""
+        self.dimensions = config('SEMANTIC_CACHE_DIMENSIONS', default=1024, cast=int)
+        self.threshold = config('SEMANTIC_CACHE_THRESHOLD', default=0.7, cast=float)
+        self.max_entries = config('SEMANTIC_CACHE_MAX_ENTRIES', default=2000, cast=int)
+        self.enabled = config('SEMANTIC_CACHE_ENABLED', default=True, cast=bool)
+
+        self._indexes: Dict[str, '_LanguageIndex'] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def tokenize(self, text: str) -> List[str]:
+        """Split a situation into word, word-bigram and character n-gram features"""
+        words = [stem(w) for w in normalize_situation(text).split() if w not in STOPWORDS]
+        features = [f"w:{w}" for w in words]
+        features.extend(f"b:{a}_{b}" for a, b in zip(words, words[1:]))
+
+        # Character n-grams make "exam", "exams" and "examination" overlap
+        for word in words:
+            padded = f"<{word}>"
+            for n in (3, 4):
+                features.extend(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+
+        return features
+
+    def term_frequencies(self, text: str) -> np.ndarray:
+        """Hash features into a sublinear term-frequency vector"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature, count in Counter(self.tokenize(text)).items():
+            # crc32 is stable across processes, unlike the builtin hash()
+            bucket = zlib.crc32(feature.encode('utf-8')) % self.dimensions
+            vector[bucket] += 1.0 + math.log(count)
+        return vector
+
+    def lookup(self, situation: str, language: str) -> Optional[Tuple[Dict, float]]:
+        """Return the closest stored dua and its similarity, if above the threshold"""
+        if not self.enabled:
+            return None
+
+        tf = self.term_frequencies(situation)
+        if not tf.any():
+            return None
+
+        with self._lock:
+            index = self._indexes.get(self._language_key(language))
+            match = index.nearest(tf) if index else None
+
+            if match and match[1] >= self.threshold:
+                self.hits += 1
+                return match
+
+            self.misses += 1
+            return None
+
+    def add(self, situation: str, language: str, dua: Dict):
+        """Remember a generated dua for future similar situations"""
+        if not self.enabled:
+            return
+
+        tf = self.term_frequencies(situation)
+        if not tf.any():
+            return
+
+        with self._lock:
+            key = self._language_key(language)
+            if key not in self._indexes:
+                self._indexes[key] = _LanguageIndex(self.dimensions, self.max_entries)
+            self._indexes[key].add(tf, dict(dua))
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and index sizes for monitoring"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'threshold': self.threshold,
+                'entries': {lang: len(index) for lang, index in self._indexes.items()}
+            }
+
+    @staticmethod
+    def _language_key(language: str) -> str:
+        return (language or '').strip().casefold()
+
+class _LanguageIndex:
+    """
+    Dense TF-IDF matrix for one language. Rows are stored as raw term
+    frequencies; the IDF-weighted, L2-normalized copy used for search is
+    rebuilt only when the corpus has grown enough to shift the weights.
+    """
+
+    REWEIGHT_GROWTH = 1.25
+
+    def __init__(self, dimensions: int, max_entries: int):
+        self.max_entries = max_entries
+        self.tf = np.zeros((min(64, max_entries), dimensions), dtype=np.float32)
+        self.weighted = np.zeros_like(self.tf)
+        self.doc_freq = np.zeros(dimensions, dtype=np.float32)
+        self.payloads: List[Optional[Dict]] = []
+        self.size = 0
+        self.cursor = 0
+        self.weighted_at = 0
+        self.idf = np.ones(dimensions, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, tf: np.ndarray, payload: Dict):
+        if self.size < self.max_entries:
+            if self.size == len(self.tf):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.payloads.append(payload)
+        else:
+            # Full: overwrite the oldest entry (ring buffer)
+            row = self.cursor
+            self.cursor = (self.cursor + 1) % self.max_entries
+            self.doc_freq -= self.tf[row] > 0
+            self.payloads[row] = payload
+
+        self.tf[row] = tf
+        self.doc_freq += tf > 0
+
+        if self.size >= self.weighted_at * self.REWEIGHT_GROWTH:
+            self._reweight()
+        else:
+            self.weighted[row] = self._weigh(tf)
+
+    def nearest(self, tf: np.ndarray) -> Optional[Tuple[Dict, float]]:
+        if not self.size:
+            return None
+        query = self._weigh(tf)
+        scores = self.weighted[:self.size] @ query
+        best = int(np.argmax(scores))
+        return dict(self.payloads[best]), float(scores[best])
+
+    def _weigh(self, tf: np.ndarray) -> np.ndarray:
+        vector = tf * self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _reweight(self):
+        self.idf = (np.log((1.0 + self.size) / (1.0 + self.doc_freq)) + 1.0).astype(np.float32)
+        weighted = self.tf[:self.size] * self.idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.weighted[:self.size] = weighted / norms
+        self.weighted_at = self.size
+
+    def _grow(self):
+        capacity = min(len(self.tf) * 2, self.max_entries)
+        for name in ('tf', 'weighted'):
+            grown = np.zeros((capacity, self.tf.shape[1]), dtype=np.float32)
+            grown[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, grown)
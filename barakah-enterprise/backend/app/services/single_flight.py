@@ -0,0 +1,97 @@
+"""
+BarakahTool Enterprise Single-Flight
+Coalesces identical concurrent generations within a worker and across workers
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from decouple import config
+
+class SingleFlight:
+    def __init__(self, cache_service):
+        """
+        Initialize single-flight coordination. In-process callers share one
+        asyncio task per key; other workers wait on a Redis lock and pick up
+        the leader's published result.
+        """
+        self.cache = cache_service
+        self.lock_ttl = config('SINGLE_FLIGHT_LOCK_TTL', default=60.0, cast=float)
+        self.wait_timeout = config('SINGLE_FLIGHT_WAIT_TIMEOUT', default=30.0, cast=float)
+        self.poll_interval = config('SINGLE_FLIGHT_POLL_INTERVAL', default=0.1, cast=float)
+        self.result_ttl = config('SINGLE_FLIGHT_RESULT_TTL', default=60, cast=int)
+
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.metrics = {
+            'leader_calls': 0,
+            'coalesced_local': 0,
+            'coalesced_remote': 0,
+            'remote_wait_timeouts': 0
+        }
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]],
+                  share: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Await the result for key, calling factory at most once per key across
+        all concurrent callers. `share` decides whether a result may be
+        published to other workers (e.g. skip fallback content).
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.metrics['coalesced_local'] += 1
+        else:
+            task = asyncio.ensure_future(self._lead(key, factory, share))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        # Shield so one client disconnecting doesn't cancel everyone's result
+        result = await asyncio.shield(task)
+        return dict(result) if isinstance(result, dict) else result
+
+    def stats(self) -> Dict:
+        """Coalescing counters for monitoring"""
+        return {**self.metrics, 'inflight': len(self._inflight)}
+
+    async def _lead(self, key: str, factory, share) -> Any:
+        acquired, token = await self.cache.acquire_lock(f"flight:{key}", self.lock_ttl)
+
+        if not acquired:
+            result = await self._await_remote(key)
+            if result is not None:
+                self.metrics['coalesced_remote'] += 1
+                return result
+            # The other worker failed or is too slow; take over ourselves
+            acquired, token = await self.cache.acquire_lock(f"flight:{key}", self.lock_ttl)
+
+        try:
+            self.metrics['leader_calls'] += 1
+            result = await factory()
+            if share is None or share(result):
+                await self.cache.set_json(f"flight:{key}:result", result, ttl=self.result_ttl)
+            return result
+        finally:
+            await self.cache.release_lock(f"flight:{key}", token)
+
+    async def _await_remote(self, key: str) -> Optional[Any]:
+        """Poll for the result another worker is producing"""
+        deadline = time.monotonic() + self.wait_timeout
+
+        while time.monotonic() < deadline:
+            result = await self.cache.get_json(f"flight:{key}:result")
+            if result is not None:
+                return result
+            if not await self.cache.lock_held(f"flight:{key}"):
+                # Lock released; the result may have landed just before
+                return await self.cache.get_json(f"flight:{key}:result")
+            await asyncio.sleep(self.poll_interval)
+
+        self.metrics['remote_wait_timeouts'] += 1
+        return None
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Retrieve exceptions so unawaited failures aren't logged as lost
+            task.exception()
@@ -0,0 +1,32 @@
+"""
+BarakahTool Enterprise Text Utilities
+Shared normalization for user-supplied situations
+"""
+
+import re
+import unicodedata
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def normalize_situation(situation: str) -> str:
+    """Normalize free-text situations so trivially different inputs share a key"""
+    text = unicodedata.normalize('NFKC', situation or '').casefold()
+    text = _PUNCTUATION_RE.sub(' ', text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+def stem(word: str) -> str:
+    """
+    Very light suffix stripping so plurals, tenses and -ness nouns share word
+    features; a doubled final consonant and a trailing e are dropped so
+    "travelling"/"travel", "illness"/"ill" and "struggling"/"struggle" line up
+    """
+    for suffix in ('nesses', 'ness', 'ing', 'ed', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    if word.endswith('e') and len(word) >= 4:
+        word = word[:-1]
+    if len(word) >= 4 and word[-1] == word[-2] and word[-1] not in 'aeiou':
+        word = word[:-1]
+    return word
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Dua Parser Micro-Benchmark
+Compares the single-pass section tokenizer with the previous multi-regex parser
+
+Usage: python benchmarks/dua_parser_benchmark.py [iterations]
+"""
+
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from services.dua_parser import parse_dua_response
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'dua_completions.json')
+
+def legacy_parse(content: str, language: str) -> dict:
+    """The parser DuaService used before the single-pass tokenizer"""
+    def clean(text):
+        if not text:
+            return ""
+        text = re.sub(r'\n+', ' ', text)
+        text = re.sub(r'\s+', ' ', text)
+        text = text.strip()
+        text = re.sub(r'\*\*', '', text)
+        text = re.sub(r'\*', '', text)
+        return text
+
+    arabic_match = re.search(r'\*\*Arabic:\*\*\s*(.*?)(?=\n\*\*|\n\n|$)', content, re.DOTALL | re.IGNORECASE)
+    transliteration_match = re.search(r'\*\*Transliteration:\*\*\s*(.*?)(?=\n\*\*|\n\n|$)', content, re.DOTALL | re.IGNORECASE)
+    translation_match = re.search(r'\*\*Translation.*?:\*\*\s*(.*?)(?=\n\*\*|\n\n|$)', content, re.DOTALL | re.IGNORECASE)
+
+    return {
+        'arabic': clean(arabic_match.group(1).strip() if arabic_match else ""),
+        'transliteration': clean(transliteration_match.group(1).strip() if transliteration_match else ""),
+        'translation': clean(translation_match.group(1).strip() if translation_match else ""),
+        'language': language,
+        'source': 'ai_generated'
+    }
+
+def run(parser, corpus, iterations: int) -> float:
+    """Seconds per completion, best of three runs"""
+    timer = timeit.Timer(lambda: [parser(content, 'English') for content in corpus])
+    best = min(timer.repeat(repeat=3, number=iterations))
+    return best / (iterations * len(corpus))
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    with open(CORPUS_PATH, encoding='utf-8') as corpus_file:
+        corpus = json.load(corpus_file)
+
+    legacy = run(legacy_parse, corpus, iterations)
+    single_pass = run(parse_dua_response, corpus, iterations)
+
+    extras = sum(
+        1 for content in corpus
+        for field in ('quranic_reference', 'timing', 'context', 'variations')
+        if field in parse_dua_response(content, 'English')
+    )
+
+    print(f"Corpus: {len(corpus)} completions x {iterations} iterations")
+    print(f"legacy multi-regex : {legacy * 1e6:8.2f} us/completion")
+    print(f"single-pass        : {single_pass * 1e6:8.2f} us/completion")
+    print(f"speedup            : {legacy / single_pass:8.2f}x")
+    print(f"premium extras kept: {extras} (legacy: 0)")
+
+if __name__ == "__main__":
+    main()
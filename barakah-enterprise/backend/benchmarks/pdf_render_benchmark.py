@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+PDF Render Benchmark
+Compares cached static markup and precompiled page artwork with parsing
+and redrawing them for every PDF
+
+Usage: python benchmarks/pdf_render_benchmark.py [documents_per_round] [collection_size]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph
+
+from pdf.enterprise_pdf_generator import EnterprisePDFGenerator
+
+SAMPLE_DUAS = [
+    ({
+        'arabic': "رَبِّ اشْرَحْ لِي صَدْرِي وَيَسِّرْ لِي أَمْرِي",
+        'transliteration': "Rabbi ishrah li sadri wa yassir li amri",
+        'translation': "My Lord, expand for me my chest and ease for me my task"
+    }, "Before an important exam"),
+    ({
+        'arabic': "اللَّهُمَّ إِنِّي أَسْأَلُكَ الْعَافِيَةَ",
+        'transliteration': "Allahumma inni as'aluka al-'afiyah",
+        'translation': "O Allah, I ask You for well-being"
+    }, "For a family member who is unwell"),
+    # Long enough to break across pages, so layout postpones flowables
+    ({
+        'arabic': " ".join(["رَبَّنَا آتِنَا فِي الدُّنْيَا حَسَنَةً وَفِي الْآخِرَةِ حَسَنَةً وَقِنَا عَذَابَ النَّارِ"] * 12),
+        'transliteration': " ".join(["Rabbana atina fid-dunya hasanatan wa fil-akhirati hasanatan wa qina 'adhaban-nar"] * 12),
+        'translation': " ".join(["Our Lord, give us good in this world and good in the Hereafter, and protect us from the punishment of the Fire."] * 16)
+    }, "Morning and evening remembrance for the whole family, recited together after Fajr and Maghrib"),
+    ({
+        'arabic': " ".join(["اللَّهُمَّ إِنِّي أَعُوذُ بِكَ مِنَ الْهَمِّ وَالْحَزَنِ وَالْعَجْزِ وَالْكَسَلِ"] * 20),
+        'transliteration': " ".join(["Allahumma inni a'udhu bika minal-hammi wal-hazan, wal-'ajzi wal-kasal"] * 20),
+        'translation': " ".join(["O Allah, I seek refuge in You from worry and grief, from incapacity and laziness."] * 24)
+    }, "Relief from anxiety"),
+]
+
+class LegacyPDFGenerator(EnterprisePDFGenerator):
+    """The generator before caching: parse the fixed text and redraw the artwork every time"""
+
+    def _static_paragraph(self, text, style):
+        return Paragraph(text, self.styles[style])
+
+    def _add_page_decorations(self, canvas_obj, doc):
+        self.draw_decorative_border(canvas_obj, doc)
+        self.add_header_decoration(canvas_obj)
+
+        width, height = A4
+        canvas_obj.setFont('Helvetica', 8)
+        canvas_obj.setFillColor(self.colors['text'])
+        canvas_obj.drawCentredString(width/2, 0.5*inch, f"Page {canvas_obj.getPageNumber()}")
+
+def collection_entries(size: int) -> list:
+    return [
+        {'dua_data': SAMPLE_DUAS[index % len(SAMPLE_DUAS)][0], 'situation': SAMPLE_DUAS[index % len(SAMPLE_DUAS)][1]}
+        for index in range(size)
+    ]
+
+def measure(generators: dict, documents: int, collection_size: int, rounds: int, output_path: str) -> dict:
+    """
+    Median CPU seconds per single-dua PDF and per collection PDF, plus how
+    many renders fell back to the plain layout. Generators take turns each
+    round so background load affects them equally.
+    """
+    entries = collection_entries(collection_size)
+    single = {name: [] for name in generators}
+    collection = {name: [] for name in generators}
+    sizes = {}
+    fallbacks = {name: 0 for name in generators}
+
+    for generator in generators.values():
+        generator.render_enterprise_pdf(*SAMPLE_DUAS[0], output_path)  # warm up imports and caches
+
+    for _ in range(rounds):
+        for name, generator in generators.items():
+            start = time.process_time()
+            for index in range(documents):
+                if not generator.render_enterprise_pdf(*SAMPLE_DUAS[index % len(SAMPLE_DUAS)], output_path):
+                    fallbacks[name] += 1
+            single[name].append((time.process_time() - start) / documents)
+
+            start = time.process_time()
+            if not generator.render_collection_pdf(entries, output_path):
+                fallbacks[name] += 1
+            collection[name].append(time.process_time() - start)
+            sizes[name] = os.path.getsize(output_path)
+
+    return {
+        name: (statistics.median(single[name]), statistics.median(collection[name]), sizes[name], fallbacks[name])
+        for name in generators
+    }
+
+def main():
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    collection_size = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rounds = 10
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        # Silence the per-document success line
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            results = measure(
+                {'legacy': LegacyPDFGenerator(), 'template': EnterprisePDFGenerator()},
+                documents, collection_size, rounds, os.path.join(output_dir, 'bench.pdf')
+            )
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    legacy, template = results['legacy'], results['template']
+    print(f"Median of {rounds} rounds, CPU time")
+    print(f"Single-dua PDFs ({documents} per round)")
+    print(f"  uncached          : {1 / legacy[0]:8.1f} PDFs/s")
+    print(f"  cached            : {1 / template[0]:8.1f} PDFs/s")
+    print(f"  speedup           : {legacy[0] / template[0]:8.2f}x")
+    print(f"Collection PDFs ({collection_size} duas each)")
+    print(f"  uncached          : {1 / legacy[1]:8.2f} PDFs/s  {legacy[2] / 1024:8.1f} KiB")
+    print(f"  cached            : {1 / template[1]:8.2f} PDFs/s  {template[2] / 1024:8.1f} KiB")
+    print(f"  speedup           : {legacy[1] / template[1]:8.2f}x")
+    print(f"Fallback renders    : legacy {legacy[3]}, template {template[3]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Dua Cache Round-Trip Tests
+
+Usage: python -m pytest tests (from backend/)
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from services.dua_library import DuaLibrary
+from services.dua_service import dua_from_cache
+
+def test_library_dua_keeps_quranic_reference_through_the_cache():
+    dua = DuaLibrary().match("I am travelling tomorrow", 'english')
+    assert dua['quranic_reference']
+
+    # What /api/dua/generate and /api/dua/batch store: a DuaResponse dict without its id
+    entry = {
+        'arabic_text': dua['arabic'],
+        'transliteration': dua['transliteration'],
+        'translation': dua['translation'],
+        'language': 'english',
+        'situation': "I am travelling tomorrow",
+        'created_at': '2026-01-01T00:00:00',
+        'pdf_url': None,
+        'quranic_reference': dua['quranic_reference'],
+        'timing': None,
+        'context': None,
+        'variations': None
+    }
+    restored = dua_from_cache(json.loads(json.dumps(entry)))
+
+    assert restored['arabic'] == dua['arabic']
+    assert restored['quranic_reference'] == dua['quranic_reference']
+    assert 'arabic_text' not in restored
@@ -0,0 +1,55 @@
+"""
+Dua Library Matching Tests
+
+Usage: python -m pytest tests (from backend/)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from services.dua_library import DuaLibrary
+from services.text_utils import stem
+
+library = DuaLibrary()
+
+def test_weak_keywords_alone_do_not_match():
+    # "job", "work", "life", "hard" and "good" are too ambiguous to pick a dua
+    assert library.match("I lost my job at work", 'english') is None
+    assert library.match("life is hard but good", 'english') is None
+
+@pytest.mark.parametrize('situation, categories', [
+    ("I am sick", {'illness'}),
+    ("my mother is ill", {'illness', 'parents'}),
+    ("I am travelling tomorrow", {'travel'}),
+    ("going on a trip", {'travel'}),
+    ("I feel stressed", {'anxiety'}),
+    ("I am anxious", {'anxiety'}),
+    ("my father passed away", {'grief', 'deceased'}),
+    ("I have debts", {'provision'}),
+    ("getting married", {'family'}),
+    ("I want to repent", {'forgiveness'}),
+    ("forgive my sins", {'forgiveness'}),
+])
+def test_single_specific_keyword_matches(situation, categories):
+    dua = library.match(situation, 'english')
+    assert dua is not None and dua['category'] in categories
+
+@pytest.mark.parametrize('a, b', [
+    ("travelling", "travel"),
+    ("illness", "ill"),
+    ("stressed", "stress"),
+    ("struggling", "struggle"),
+])
+def test_inflections_share_a_stem(a, b):
+    assert stem(a) == stem(b)
+
+def test_category_name_matches():
+    dua = library.match("success in my business", 'english')
+    assert dua is not None and dua['category'] == 'success'
+
+def test_fallback_still_uses_generic_keywords():
+    assert library.fallback("I lost my job at work", 'english')['category'] == 'success'
@@ -0,0 +1,271 @@
+"""
+OpenAI Client Resilience Tests
+Runs the client against a local stub of the chat completions endpoint
+
+Usage: python -m pytest tests (from backend/)
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from services.openai_client import CircuitOpenError, ResilientOpenAIClient
+
+COMPLETION = {
+    'id': 'chatcmpl-stub',
+    'object': 'chat.completion',
+    'created': 0,
+    'model': 'stub',
+    'choices': [{
+        'index': 0,
+        'finish_reason': 'stop',
+        'message': {'role': 'assistant', 'content': 'ok'}
+    }]
+}
+
+PARAMS = {'model': 'stub', 'messages': [{'role': 'user', 'content': 'hi'}]}
+
+def sse_chunks(text: str, cut: bool) -> bytes:
+    """A completion stream of text in a few deltas, optionally without its end"""
+    events = []
+    for start in range(0, len(text), 40):
+        chunk = {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion.chunk',
+            'created': 0,
+            'model': 'stub',
+            'choices': [{'index': 0, 'finish_reason': None,
+                         'delta': {'content': text[start:start + 40]}}]
+        }
+        events.append(f"data: {json.dumps(chunk)}\n\n")
+    if not cut:
+        events.append("data: [DONE]\n\n")
+    return ''.join(events).encode('utf-8')
+
+class StubOpenAI:
+    """
+    Answers chat completions with scripted (status, headers) replies, or a
+    streamed reply; a cut stream announces more bytes than it sends
+    """
+
+    def __init__(self):
+        self.replies = deque()
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                stub.requests += 1
+                status, headers = stub.replies.popleft() if stub.replies else (200, {})
+                if status == 'stream':
+                    payload, cut = sse_chunks(headers['text'], headers['cut']), headers['cut']
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/event-stream')
+                    self.send_header('Content-Length', str(len(payload) + (100 if cut else 0)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    self.close_connection = True
+                    return
+
+                body = COMPLETION if status == 200 else {'error': {'message': f'stub {status}'}}
+                payload = json.dumps(body).encode('utf-8')
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reply(self, *replies):
+        self.replies.extend(r if isinstance(r, tuple) else (r, {}) for r in replies)
+
+    def stream(self, text: str, cut: bool = False):
+        self.replies.append(('stream', {'text': text, 'cut': cut}))
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = StubOpenAI()
+    monkeypatch.setenv('OPENAI_BASE_URL', server.url)
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-stub')
+    monkeypatch.setenv('OPENAI_BACKOFF_BASE', '0.01')
+    monkeypatch.setenv('OPENAI_BREAKER_THRESHOLD', '2')
+    monkeypatch.setenv('OPENAI_BREAKER_RESET', '0.2')
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+def run(scenario):
+    """Run a scenario with a client bound to the test's own event loop"""
+    async def main():
+        client = ResilientOpenAIClient()
+        try:
+            return await scenario(client)
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+def test_retries_429_after_retry_after(stub):
+    stub.reply((429, {'Retry-After': '0.3'}), 200)
+
+    async def scenario(client):
+        started = time.monotonic()
+        response = await client.chat_completion(**PARAMS)
+        return response, time.monotonic() - started, client.stats()
+
+    response, elapsed, stats = run(scenario)
+    assert response.choices[0].message.content == 'ok'
+    assert elapsed >= 0.3
+    assert stats['retries'] == 1 and stub.requests == 2
+
+def test_retries_5xx_with_jittered_backoff(stub, monkeypatch):
+    monkeypatch.setenv('OPENAI_BREAKER_THRESHOLD', '5')
+    stub.reply(503, 502, 200)
+
+    async def scenario(client):
+        response = await client.chat_completion(**PARAMS)
+        return response, client.stats()
+
+    response, stats = run(scenario)
+    assert response.choices[0].message.content == 'ok'
+    assert stats['retries'] == 2 and stub.requests == 3
+    assert stats['breaker']['state'] == 'closed'
+
+def test_backoff_is_full_jitter_capped_by_attempt(stub):
+    async def scenario(client):
+        return [client._backoff(2, RuntimeError()) for _ in range(50)], client.backoff_base
+
+    delays, base = run(scenario)
+    assert all(0 <= delay <= base * 4 for delay in delays)
+    assert len(set(delays)) > 1
+
+def test_breaker_opens_half_opens_and_closes(stub, monkeypatch):
+    monkeypatch.setenv('OPENAI_MAX_RETRIES', '0')
+    stub.reply(500, 500, 200)
+
+    async def scenario(client):
+        for _ in range(2):
+            with pytest.raises(openai.InternalServerError):
+                await client.chat_completion(**PARAMS)
+        assert client.breaker.state == 'open'
+
+        # Open: rejected without reaching the provider
+        with pytest.raises(CircuitOpenError):
+            await client.chat_completion(**PARAMS)
+        assert stub.requests == 2
+
+        # After the reset timeout one probe goes through and closes the breaker
+        await asyncio.sleep(0.25)
+        await client.chat_completion(**PARAMS)
+        return client.breaker.state
+
+    assert run(scenario) == 'closed'
+    assert stub.requests == 3
+
+def test_client_error_does_not_settle_half_open_probe(stub, monkeypatch):
+    monkeypatch.setenv('OPENAI_MAX_RETRIES', '0')
+    stub.reply(500, 500, 400, 200)
+
+    async def scenario(client):
+        for _ in range(2):
+            with pytest.raises(openai.InternalServerError):
+                await client.chat_completion(**PARAMS)
+        await asyncio.sleep(0.25)
+
+        with pytest.raises(openai.BadRequestError):
+            await client.chat_completion(**PARAMS)
+        # Still half-open, and the probe slot is free for the next call
+        assert client.breaker.state == 'half_open'
+
+        await client.chat_completion(**PARAMS)
+        return client.breaker.state
+
+    assert run(scenario) == 'closed'
+
+def test_open_breaker_short_circuits_to_fallback(stub, monkeypatch):
+    monkeypatch.setenv('OPENAI_MAX_RETRIES', '0')
+    monkeypatch.setenv('SEMANTIC_CACHE_ENABLED', 'False')
+    from services.dua_service import DuaService
+
+    stub.reply(500, 500)
+
+    async def scenario():
+        service = DuaService()
+        try:
+            for _ in range(2):
+                await service.generate_dua("a situation no library dua covers", premium=True)
+            assert service.client.breaker.state == 'open'
+
+            started = time.monotonic()
+            dua = await service.generate_dua("a situation no library dua covers", premium=True)
+            return dua, time.monotonic() - started
+        finally:
+            await service.client.close()
+
+    dua, elapsed = asyncio.run(scenario())
+    assert dua['source'] == 'fallback' and dua['arabic']
+    assert stub.requests == 2
+    assert elapsed < 0.1
+
+DUA_COMPLETION = (
+    "**Arabic:**\nاللَّهُمَّ اشْفِ\n\n"
+    "**Transliteration:**\nAllahumma ishfi\n\n"
+    "**Translation in English:**\nO Allah, heal"
+)
+
+def test_stream_settles_breaker_when_it_ends(stub):
+    stub.stream(DUA_COMPLETION)
+    stub.stream(DUA_COMPLETION, cut=True)
+
+    async def scenario(client):
+        client.breaker.failures = 1
+        stream = await client.chat_completion(**PARAMS, stream=True)
+        # Opening the stream alone is no verdict
+        assert client.breaker.failures == 1
+        async for _ in stream:
+            pass
+        assert client.breaker.failures == 0
+
+        stream = await client.chat_completion(**PARAMS, stream=True)
+        with pytest.raises(Exception):
+            async for _ in stream:
+                pass
+        return client.breaker.stats()
+
+    assert run(scenario) == {'state': 'closed', 'failures': 1}
+
+def test_stream_error_after_sections_ends_without_fallback(stub):
+    from services.dua_service import DuaService
+
+    stub.stream(DUA_COMPLETION, cut=True)
+
+    async def scenario():
+        service = DuaService()
+        try:
+            return [event async for event in service.stream_dua("stub situation", premium=True)]
+        finally:
+            await service.client.close()
+
+    events = asyncio.run(scenario())
+    kinds = [event['event'] for event in events]
+    assert kinds[0] == 'section' and kinds[-1] == 'error'
+    assert 'fallback' not in kinds and 'complete' not in kinds
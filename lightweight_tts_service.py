@@ -10,6 +10,8 @@ import base64
 import hashlib
 import time
 
+from tts_text import PAUSE_AFTER_CLAUSE, PAUSE_AFTER_SENTENCE, split_text
+
 class LightweightTTSService:
     def __init__(self):
         self.is_initialized = True
@@ -17,9 +19,6 @@ class LightweightTTSService:
         
     def preprocess_islamic_text(self, text):
         """Professional preprocessing for Islamic content"""
-        # Limit text length for better quality
-        text = text[:1000]
-        
         # Add natural pauses for better narration
         text = text.replace('.', '. ')
         text = text.replace(',', ', ')
@@ -68,11 +67,16 @@ class LightweightTTSService:
                     'Alhamdulillah', 'Subhanallah', 'Mashallah', 'Inshallah'
                 ],
                 'processing_hints': {
-                    'pause_after_sentences': 0.5,
-                    'pause_after_commas': 0.3,
+                    'pause_after_sentences': PAUSE_AFTER_SENTENCE,
+                    'pause_after_commas': PAUSE_AFTER_CLAUSE,
                     'emphasis_islamic_terms': True,
                     'child_friendly': True
-                }
+                },
+                # Long stories are spoken chunk by chunk; browsers cut off long utterances
+                'chunks': [
+                    {'text': chunk, 'pause_after': pause}
+                    for chunk, pause in split_text(processed_text)
+                ]
             }
             
             # Generate a unique ID for this audio
@@ -94,6 +98,18 @@ class LightweightTTSService:
             print(f"❌ Metadata generation failed: {e}", file=sys.stderr)
             raise e
 
+def handle_request(tts_service, request):
+    """Validate one JSON request and build its audio metadata"""
+    # Validate required fields
+    if 'text' not in request:
+        raise ValueError("Missing 'text' field in request")
+    
+    text = request['text']
+    language = request.get('language', 'english')
+    
+    # Generate enhanced metadata for frontend processing
+    return tts_service.generate_audio_metadata(text, language)
+
 def main():
     """Main service entry point"""
     try:
@@ -109,18 +125,10 @@ def main():
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON input: {e}")
         
-        # Validate required fields
-        if 'text' not in request:
-            raise ValueError("Missing 'text' field in request")
-        
-        text = request['text']
-        language = request.get('language', 'english')
-        
         # Initialize TTS service
         tts_service = LightweightTTSService()
         
-        # Generate enhanced metadata for frontend processing
-        result = tts_service.generate_audio_metadata(text, language)
+        result = handle_request(tts_service, request)
         
         print(json.dumps(result))
         
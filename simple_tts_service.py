@@ -6,12 +6,14 @@ Uses pyttsx3 for offline high-quality speech synthesis
 
 import sys
 import json
-import base64
 import io
 import tempfile
 import os
 from pathlib import Path
 
+from tts_cache import audio_cache, speech_result
+from tts_codecs import data_uri, encode, resolve_encoding
+
 try:
     import pyttsx3
     import wave
@@ -23,6 +25,7 @@ class SimpleTTSService:
     def __init__(self):
         self.engine = None
         self.is_initialized = False
+        self.voice_settings = {}
         if TTS_AVAILABLE:
             self.init_engine()
         
@@ -53,6 +56,13 @@ class SimpleTTSService:
             self.engine.setProperty('rate', 160)    # Slower for children
             self.engine.setProperty('volume', 0.9)  # High volume
             
+            # Part of the audio cache key; read once, the engine isn't thread-safe
+            self.voice_settings = {
+                'voice': self.engine.getProperty('voice'),
+                'rate': self.engine.getProperty('rate'),
+                'volume': self.engine.getProperty('volume')
+            }
+            
             self.is_initialized = True
             print("✅ Professional TTS engine initialized", file=sys.stderr)
             
@@ -62,9 +72,6 @@ class SimpleTTSService:
     
     def preprocess_islamic_text(self, text):
         """Professional preprocessing for Islamic content"""
-        # Limit text length for better quality
-        text = text[:800]
-        
         # Add natural pauses for better narration
         text = text.replace('.', '. ')
         text = text.replace(',', ', ')
@@ -95,14 +102,35 @@ class SimpleTTSService:
         
         return text
     
-    def synthesize_speech(self, text, language='english'):
-        """Generate professional speech synthesis"""
+    def cache_key(self, processed_text, language, audio_format='wav', bitrate=None):
+        """Audio cache key: everything that shapes the output besides the text"""
+        return audio_cache.key(processed_text, language.lower(), 'pyttsx3',
+                               {**self.voice_settings, 'bitrate': bitrate}, audio_format)
+    
+    def cached_speech(self, text, language='english', audio_format='wav', bitrate=None):
+        """Data URI of already-synthesized audio for this text, or None"""
+        audio_format, bitrate = resolve_encoding(audio_format, bitrate)
+        key = self.cache_key(self.preprocess_islamic_text(text), language, audio_format, bitrate)
+        return audio_cache.get_data_uri(key, audio_format)
+    
+    def synthesize_speech(self, text, language='english', audio_format='wav', bitrate=None):
+        """Generate professional speech synthesis as a WAV, Opus, MP3 or Ogg data URI"""
         if not self.is_initialized or not self.engine:
             raise Exception("TTS engine not initialized")
         
         try:
+            audio_format, bitrate = resolve_encoding(audio_format, bitrate)
+            
             # Preprocess text for Islamic content
             processed_text = self.preprocess_islamic_text(text)
+            
+            # Repeat narrations come straight from the audio cache
+            key = self.cache_key(processed_text, language, audio_format, bitrate)
+            cached = audio_cache.get_data_uri(key, audio_format)
+            if cached is not None:
+                print(f"⚡ Cached speech: {processed_text[:50]}...", file=sys.stderr)
+                return cached
+            
             print(f"🔊 Generating speech: {processed_text[:50]}...", file=sys.stderr)
             
             # Create temporary file for audio
@@ -118,11 +146,12 @@ class SimpleTTSService:
                 with open(tmp_path, 'rb') as audio_file:
                     audio_data = audio_file.read()
                 
-                # Convert to base64
-                audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+                if audio_format != 'wav':
+                    audio_data = encode(audio_data, audio_format, bitrate)
+                audio_cache.put(key, audio_data, audio_format)
                 
-                print("✅ Professional speech synthesis completed", file=sys.stderr)
-                return f"data:audio/wav;base64,{audio_base64}"
+                print(f"✅ Professional speech synthesis completed ({audio_format}, {len(audio_data)} bytes)", file=sys.stderr)
+                return data_uri(audio_data, audio_format)
                 
             finally:
                 # Clean up temporary file
@@ -133,6 +162,16 @@ class SimpleTTSService:
             print(f"❌ Speech synthesis failed: {e}", file=sys.stderr)
             raise e
 
+def handle_request(tts_service, request):
+    """Validate one JSON request and synthesize it with a ready service"""
+    return speech_result(tts_service.synthesize_speech, request, service='Professional pyttsx3 TTS')
+
+def cached_result(tts_service, request):
+    """handle_request's result when the audio is already cached, else None (never synthesizes)"""
+    if 'text' not in request:
+        return None
+    return speech_result(tts_service.cached_speech, request, service='Professional pyttsx3 TTS')
+
 def main():
     """Main service entry point"""
     try:
@@ -151,30 +190,13 @@ def main():
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON input: {e}")
         
-        # Validate required fields
-        if 'text' not in request:
-            raise ValueError("Missing 'text' field in request")
-        
-        text = request['text']
-        language = request.get('language', 'english')
-        
         # Initialize TTS service
         tts_service = SimpleTTSService()
         
         if not tts_service.is_initialized:
             raise Exception("Failed to initialize professional TTS service")
         
-        # Generate speech
-        audio_data = tts_service.synthesize_speech(text, language)
-        
-        # Return result
-        result = {
-            'success': True,
-            'audio_data': audio_data,
-            'language': language,
-            'text_length': len(text),
-            'service': 'Professional pyttsx3 TTS'
-        }
+        result = handle_request(tts_service, request)
         
         print(json.dumps(result))
         
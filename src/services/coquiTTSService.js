@@ -1,5 +1,6 @@
 // Professional Coqui TTS Service for Islamic Content
 const { spawn } = require('child_process');
+const net = require('net');
 const path = require('path');
 
 class CoquiTTSService {
@@ -7,6 +8,12 @@ class CoquiTTSService {
     this.isInitialized = false;
     this.pythonPath = 'python3'; // Can be configured via environment
     this.servicePath = path.join(__dirname, '../../lightweight_tts_service.py');
+    // Persistent tts_server.py socket; when set, requests skip the per-call Python spawn
+    this.serverSocket = process.env.TTS_SERVER_SOCKET || null;
+    // Full-length stories are synthesized chunk by chunk, so the deadline grows with the text
+    this.timeoutMs = Number(process.env.TTS_TIMEOUT_MS) || 30000;
+    this.timeoutPerChunkMs = Number(process.env.TTS_TIMEOUT_PER_CHUNK_MS) || 10000;
+    this.chunkChars = Number(process.env.TTS_CHUNK_CHARS) || 250; // matches tts_text.py
     this.initializeService();
   }
 
@@ -93,9 +100,6 @@ class CoquiTTSService {
 
   // Professional text preprocessing for Islamic stories
   preprocessText(text) {
-    // Limit text length for better quality
-    text = text.substring(0, 1000);
-    
     // Clean up text for better speech synthesis
     text = text.replace(/[^\w\s.,!?;:'"()-]/g, ' '); // Remove special characters
     text = text.replace(/\s+/g, ' '); // Normalize whitespace
@@ -128,6 +132,15 @@ class CoquiTTSService {
           language: mappedLanguage
         };
 
+        const timeoutMs = this.synthesisTimeout(processedText);
+
+        if (this.serverSocket) {
+          this.requestFromServer(requestData, timeoutMs)
+            .then((result) => resolve(this.unwrapResult(result)))
+            .catch(reject);
+          return;
+        }
+
         // Spawn Python TTS service
         const ttsProcess = spawn(this.pythonPath, [this.servicePath]);
         
@@ -153,24 +166,12 @@ class CoquiTTSService {
             try {
               const result = JSON.parse(output.trim());
               
-              if (result.success) {
-                console.log('✅ Coqui TTS audio generated successfully');
-                // Check if we have audio metadata from lightweight service
-                if (result.audio_config && result.processing_instructions === 'use_enhanced_browser_tts') {
-                  // Return the full lightweight TTS result for enhanced browser TTS
-                  resolve(result);
-                } else if (result.audio_data) {
-                  // Return legacy audio data
-                  resolve(result.audio_data);
-                } else {
-                  // Fallback for other cases
-                  resolve(result);
-                }
-              } else {
-                console.error('❌ Coqui TTS generation failed:', result.error);
-                reject(new Error(`Coqui TTS failed: ${result.error}`));
-              }
+              resolve(this.unwrapResult(result));
             } catch (parseError) {
+              if (!(parseError instanceof SyntaxError)) {
+                reject(parseError);
+                return;
+              }
               console.error('❌ Failed to parse TTS output:', parseError);
               console.error('Raw output:', output);
               reject(new Error('Failed to parse TTS service response'));
@@ -192,7 +193,7 @@ class CoquiTTSService {
         setTimeout(() => {
           ttsProcess.kill();
           reject(new Error('TTS service timeout - process took too long'));
-        }, 30000); // 30 second timeout
+        }, timeoutMs);
 
       } catch (error) {
         console.error('❌ Coqui TTS synthesis error:', error);
@@ -201,6 +202,78 @@ class CoquiTTSService {
     });
   }
 
+  // Shape a Python service result the way callers expect
+  unwrapResult(result) {
+    if (!result.success) {
+      console.error('❌ Coqui TTS generation failed:', result.error);
+      throw new Error(`Coqui TTS failed: ${result.error}`);
+    }
+
+    console.log('✅ Coqui TTS audio generated successfully');
+    // Check if we have audio metadata from lightweight service
+    if (result.audio_config && result.processing_instructions === 'use_enhanced_browser_tts') {
+      // Return the full lightweight TTS result for enhanced browser TTS
+      return result;
+    } else if (result.audio_data) {
+      // Return legacy audio data
+      return result.audio_data;
+    }
+    // Fallback for other cases
+    return result;
+  }
+
+  // Base deadline plus an allowance for every sentence chunk the server will synthesize
+  synthesisTimeout(text) {
+    const chunks = Math.max(1, Math.ceil(text.length / this.chunkChars));
+    return this.timeoutMs + chunks * this.timeoutPerChunkMs;
+  }
+
+  // One newline-delimited JSON request to the persistent TTS server
+  requestFromServer(requestData, timeoutMs = this.synthesisTimeout(requestData.text)) {
+    return new Promise((resolve, reject) => {
+      const socket = net.createConnection(this.serverSocket);
+      let buffer = '';
+      let answered = false;
+
+      const timer = setTimeout(() => {
+        socket.destroy();
+        reject(new Error('TTS service timeout - process took too long'));
+      }, timeoutMs);
+
+      socket.on('connect', () => {
+        socket.write(JSON.stringify(requestData) + '\n');
+      });
+
+      socket.on('data', (data) => {
+        buffer += data.toString();
+        const newline = buffer.indexOf('\n');
+        if (newline === -1) return;
+
+        answered = true;
+        clearTimeout(timer);
+        socket.end();
+        try {
+          resolve(JSON.parse(buffer.slice(0, newline)));
+        } catch (parseError) {
+          reject(new Error('Failed to parse TTS service response'));
+        }
+      });
+
+      socket.on('error', (error) => {
+        clearTimeout(timer);
+        console.error('❌ TTS server connection error:', error.message);
+        reject(new Error(`TTS server unavailable: ${error.message}`));
+      });
+
+      // Server crashed or was killed mid-request: fail now, not when the timer fires
+      socket.on('close', () => {
+        if (answered) return;
+        clearTimeout(timer);
+        reject(new Error('TTS server closed the connection'));
+      });
+    });
+  }
+
   // Test if Coqui TTS is available and working
   async testConnection() {
     try {
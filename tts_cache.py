@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Synthesized Audio Cache
+Content-addressed on-disk cache of encoded narration, shared by the TTS backends
+"""
+
+import sys
+import os
+import json
+import hashlib
+import threading
+
+from tts_codecs import data_uri, resolve_encoding
+
+class AudioCache:
+    def __init__(self, directory=None, max_bytes=None):
+        """
+        Audio files named by the digest of everything that shapes them, under
+        TTS_CACHE_DIR. File modification time is the LRU clock: reads bump it,
+        and the oldest files go first once TTS_CACHE_MAX_MB is exceeded.
+        A budget of 0 disables the cache.
+        """
+        self.directory = directory or os.environ.get(
+            'TTS_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tts_cache')
+        )
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('TTS_CACHE_MAX_MB', 512)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        # Evict down to this fraction of the budget, so eviction doesn't run on every write
+        self.low_water = 0.9
+        self.lock = threading.Lock()
+        self.total_bytes = None  # measured on the first write
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(text, language, model, voice_settings=None, audio_format='wav'):
+        """Digest of the processed text, language, model, voice settings and output format"""
+        canonical = json.dumps(
+            {'text': text, 'language': language, 'model': model,
+             'voice': voice_settings or {}, 'format': audio_format},
+            sort_keys=True, ensure_ascii=False, separators=(',', ':')
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def path(self, key, audio_format='wav'):
+        return os.path.join(self.directory, key[:2], f"{key}.{audio_format}")
+
+    def get(self, key, audio_format='wav'):
+        """Cached audio bytes, or None"""
+        if not self.enabled:
+            return None
+
+        path = self.path(key, audio_format)
+        try:
+            with open(path, 'rb') as audio_file:
+                data = audio_file.read()
+        except OSError:
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def get_data_uri(self, key, audio_format='wav'):
+        """Cached audio as a data URI, or None"""
+        data = self.get(key, audio_format)
+        return data_uri(data, audio_format) if data is not None else None
+
+    def put(self, key, data, audio_format='wav'):
+        """Store audio atomically (temp file, then rename). Failures are logged, never raised."""
+        if not self.enabled:
+            return
+
+        path = self.path(key, audio_format)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'wb') as audio_file:
+                audio_file.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not cache audio {key[:12]}: {e}", file=sys.stderr)
+            return
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = self.scan_total()
+            else:
+                self.total_bytes += len(data)
+            over_budget = self.total_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used files until under the low-water mark"""
+        with self.lock:
+            files = self.scan()
+            total = sum(size for _, size, _ in files)
+            evicted = 0
+            if total > self.max_bytes:
+                target = self.max_bytes * self.low_water
+                for path, size, _ in sorted(files, key=lambda entry: entry[2]):
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    evicted += 1
+            self.total_bytes = total
+
+        if evicted:
+            print(f"♻️ Evicted {evicted} cached audio files", file=sys.stderr)
+        return evicted
+
+    def scan(self):
+        """(path, size, mtime) of every cached file"""
+        files = []
+        if not os.path.isdir(self.directory):
+            return files
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def scan_total(self):
+        return sum(size for _, size, _ in self.scan())
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes
+        }
+
+def speech_result(speak, request, **extra):
+    """
+    Validate one JSON request and build the result shared by the TTS
+    backends. speak(text, language, audio_format, bitrate) returns a data URI,
+    or None (a cache miss), in which case the result is None too.
+    """
+    if 'text' not in request:
+        raise ValueError("Missing 'text' field in request")
+
+    text = request['text']
+    language = request.get('language', 'english')
+    audio_format, bitrate = resolve_encoding(request.get('format'), request.get('bitrate'))
+    audio_data = speak(text, language, audio_format, bitrate)
+    if audio_data is None:
+        return None
+
+    return {
+        'success': True,
+        'audio_data': audio_data,
+        'audio_format': audio_format,
+        'bitrate': bitrate,
+        'language': language,
+        'text_length': len(text),
+        **extra
+    }
+
+# Create singleton instance
+audio_cache = AudioCache()
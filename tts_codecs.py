@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Audio Encodings for TTS Output
+Compresses narration to Opus, MP3 or Ogg Vorbis with speech bitrate presets,
+piping through a local ffmpeg so nothing touches disk
+"""
+
+import sys
+import os
+import base64
+import shutil
+import subprocess
+from functools import lru_cache
+
+FFMPEG = os.environ.get('FFMPEG_PATH', 'ffmpeg')
+
+# Mono speech needs far less than music; "speech" is the default preset
+CODECS = {
+    'wav': {
+        'mime': 'audio/wav'
+    },
+    'opus': {
+        'mime': 'audio/ogg',
+        # libopus only accepts 8/12/16/24/48 kHz; voip mode tunes it for speech
+        'args': ['-c:a', 'libopus', '-application', 'voip', '-ar', '24000', '-f', 'ogg'],
+        'presets': {'low': '16k', 'speech': '24k', 'high': '32k'}
+    },
+    'mp3': {
+        'mime': 'audio/mpeg',
+        'args': ['-c:a', 'libmp3lame', '-f', 'mp3'],
+        'presets': {'low': '32k', 'speech': '48k', 'high': '64k'}
+    },
+    'ogg': {
+        'mime': 'audio/ogg',
+        'args': ['-c:a', 'libvorbis', '-f', 'ogg'],
+        'presets': {'low': '32k', 'speech': '48k', 'high': '64k'}
+    }
+}
+
+DEFAULT_FORMAT = os.environ.get('TTS_AUDIO_FORMAT', 'wav').lower()
+DEFAULT_PRESET = 'speech'
+
+@lru_cache(maxsize=None)
+def ffmpeg_path():
+    """Resolve the ffmpeg binary once per process, warning once if it's missing"""
+    path = shutil.which(FFMPEG)
+    if path is None:
+        print(f"⚠️ ffmpeg not found ({FFMPEG}), compressed formats will be sent as WAV", file=sys.stderr)
+    return path
+
+def ffmpeg_available():
+    return ffmpeg_path() is not None
+
+def resolve_encoding(audio_format=None, bitrate=None):
+    """
+    Validate a requested format and bitrate (a preset name or e.g. "40k").
+    Returns (format, bitrate), bitrate None for WAV. Compressed formats fall
+    back to WAV when ffmpeg isn't installed.
+    """
+    audio_format = (audio_format or DEFAULT_FORMAT).lower()
+    if audio_format not in CODECS:
+        raise ValueError(f"Unsupported audio format '{audio_format}', expected one of {', '.join(CODECS)}")
+    if audio_format == 'wav':
+        return 'wav', None
+
+    presets = CODECS[audio_format]['presets']
+    bitrate = str(bitrate or DEFAULT_PRESET).lower()
+    if bitrate in presets:
+        bitrate = presets[bitrate]
+    elif bitrate.rstrip('k').isdigit() and 6 <= int(bitrate.rstrip('k')) <= 320:
+        bitrate = f"{int(bitrate.rstrip('k'))}k"
+    else:
+        raise ValueError(f"Invalid bitrate '{bitrate}', use {', '.join(presets)} or e.g. 40k")
+
+    if not ffmpeg_available():
+        return 'wav', None
+    return audio_format, bitrate
+
+def encode(audio_bytes, audio_format, bitrate, sample_rate=None):
+    """
+    Encode with ffmpeg over pipes. Input is 16-bit mono PCM when sample_rate
+    is given, otherwise any file ffmpeg can probe (e.g. a WAV).
+    """
+    if sample_rate is not None:
+        input_args = ['-f', 's16le', '-ar', str(sample_rate), '-ac', '1']
+    else:
+        input_args = []
+
+    command = [
+        ffmpeg_path(), '-hide_banner', '-loglevel', 'error',
+        *input_args, '-i', 'pipe:0',
+        '-ac', '1', '-b:a', bitrate, *CODECS[audio_format]['args'], 'pipe:1'
+    ]
+    result = subprocess.run(command, input=audio_bytes, capture_output=True, timeout=120)
+    if result.returncode != 0 or not result.stdout:
+        raise Exception(f"ffmpeg {audio_format} encoding failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return result.stdout
+
+def data_uri(audio_bytes, audio_format):
+    return f"data:{CODECS[audio_format]['mime']};base64,{base64.b64encode(audio_bytes).decode('ascii')}"
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Persistent TTS Server for Islamic Content
+Keeps one TTS service (and its models) warm and answers many requests per process
+
+Newline-delimited JSON over a Unix socket:
+    python3 tts_server.py --backend professional --socket /tmp/barakah-tts.sock
+    -> {"id": 1, "text": "Bismillah", "language": "english"}
+    <- {"id": 1, "success": true, "audio_data": "data:audio/wav;base64,...", ...}
+    -> {"op": "health"}
+    <- {"success": true, "ready": true, "backend": "professional", ...}
+
+Or local HTTP:
+    python3 tts_server.py --backend professional --http 127.0.0.1:8765
+    POST /synthesize         (same JSON body as the one-shot scripts)
+    POST /synthesize/stream  (chunked audio/wav, sent sentence by sentence)
+    GET  /health             (200 once models are loaded, 503 while loading)
+
+Streaming over the socket: add "stream": true to a request and the reply is
+framed events, each audio event followed by exactly "bytes" of 16-bit PCM:
+    <- {"id": 1, "event": "start", "encoding": "pcm_s16le", "sample_rate": 22050, "channels": 1, ...}
+    <- {"id": 1, "event": "audio", "index": 0, "bytes": 48510}  + 48510 raw bytes
+    <- {"id": 1, "event": "end", "success": true, "chunks": 12, "duration": 41.2}
+"""
+
+import sys
+import json
+import os
+import time
+import struct
+import signal
+import argparse
+import importlib
+import queue
+import threading
+import socketserver
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# backend name -> (module, service class); imported lazily so the
+# lightweight backend never pulls in torch
+BACKENDS = {
+    'professional': ('tts_service', 'ProfessionalTTSService'),
+    'simple': ('simple_tts_service', 'SimpleTTSService'),
+    'lightweight': ('lightweight_tts_service', 'LightweightTTSService')
+}
+
+def wav_stream_header(sample_rate, channels=1, bits=16):
+    """RIFF/WAVE header for PCM of unknown length (sizes set to the maximum, as streaming players expect)"""
+    block_align = channels * bits // 8
+    return (
+        b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE'
+        + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate, sample_rate * block_align, block_align, bits)
+        + b'data' + struct.pack('<I', 0xFFFFFFFF)
+    )
+
+class TTSServer:
+    def __init__(self, backend='professional', ready_timeout=120.0):
+        """Load the backend once in the background; requests wait until it is ready"""
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown TTS backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+        self.backend = backend
+        self.ready_timeout = ready_timeout
+        self.service = None
+        self.module = None
+        self.load_error = None
+        self.load_seconds = None
+        self.started_at = time.time()
+        self.requests_served = 0
+        self.ready = threading.Event()
+        # Coqui models and the pyttsx3 event loop are not safe to share across threads
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Import the backend, construct the service and preload its hot models"""
+        start = time.monotonic()
+        try:
+            module_name, class_name = BACKENDS[self.backend]
+            self.module = importlib.import_module(module_name)
+            service = getattr(self.module, class_name)()
+
+            if getattr(service, 'is_initialized', True) is False:
+                raise Exception(f"{class_name} failed to initialize")
+
+            # Load and warm the hot models now rather than on the first request
+            if hasattr(service, 'preload'):
+                service.preload()
+
+            self.service = service
+            self.load_seconds = round(time.monotonic() - start, 3)
+            print(f"✅ TTS server ready ({self.backend}) in {self.load_seconds}s", file=sys.stderr)
+
+        except Exception as e:
+            self.load_error = str(e)
+            print(f"❌ TTS server failed to load {self.backend}: {e}", file=sys.stderr)
+
+        finally:
+            self.ready.set()
+
+    def start_loading(self):
+        threading.Thread(target=self.load, name='tts-load', daemon=True).start()
+
+    def health(self):
+        """Readiness report"""
+        status = {
+            'success': True,
+            'ready': self.service is not None,
+            'loading': not self.ready.is_set(),
+            'backend': self.backend,
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started_at, 3),
+            'load_seconds': self.load_seconds,
+            'requests_served': self.requests_served
+        }
+        if self.load_error:
+            status['error'] = self.load_error
+        if hasattr(self.service, 'model_metrics'):
+            status['models'] = self.service.model_metrics()
+        if hasattr(self.module, 'audio_cache'):
+            status['audio_cache'] = self.module.audio_cache.stats()
+        return status
+
+    def handle(self, request):
+        """Answer one request dict with a response dict (never raises)"""
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+
+            if request.get('op', 'synthesize') in ('health', 'ready'):
+                result = self.health()
+            elif request.get('op', 'synthesize') != 'synthesize':
+                raise ValueError(f"Unknown op '{request['op']}'")
+            else:
+                result = self.synthesize(request)
+
+        except Exception as e:
+            result = {
+                'success': False,
+                'error': str(e),
+                'error_type': type(e).__name__
+            }
+
+        if request_id is not None:
+            result['id'] = request_id
+        return result
+
+    def wait_until_ready(self):
+        if not self.ready.wait(self.ready_timeout):
+            raise TimeoutError("TTS models are still loading")
+        if self.service is None:
+            raise Exception(f"TTS backend unavailable: {self.load_error}")
+
+    def synthesize(self, request):
+        self.wait_until_ready()
+
+        # Cache hits don't touch the model, so they needn't queue behind a synthesis
+        if hasattr(self.module, 'cached_result'):
+            result = self.module.cached_result(self.service, request)
+            if result is not None:
+                self.requests_served += 1
+                return result
+
+        with self.lock:
+            result = self.module.handle_request(self.service, request)
+            self.requests_served += 1
+        return result
+
+    def stream(self, request):
+        """
+        Synthesize sentence by sentence, yielding (event, audio bytes or None):
+        a start event with the PCM format, an audio event per chunk as soon as
+        it is ready, then an end event. Failures, including text that yields no
+        audio at all, are yielded as an error event.
+        """
+        request_id = request.get('id')
+        try:
+            text = request.get('text')
+            if not isinstance(text, str) or not text.strip():
+                raise ValueError("Missing 'text' field in request")
+            self.wait_until_ready()
+            if not hasattr(self.service, 'stream_speech'):
+                raise ValueError(f"Streaming is not supported by the {self.backend} backend")
+
+            # Synthesis runs under the model lock on its own thread; this generator
+            # only relays finished chunks, so a slow reader never holds the lock
+            chunks = queue.Queue()
+            cancelled = threading.Event()
+            threading.Thread(target=self.produce, name='tts-stream', daemon=True,
+                             args=(text, request.get('language', 'english'), chunks, cancelled)).start()
+
+            index = samples = 0
+            try:
+                while True:
+                    chunk = chunks.get()
+                    if chunk is None:
+                        break
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    sample_rate, audio = chunk
+                    if index == 0:
+                        yield self.tag({'event': 'start', 'success': True, 'encoding': 'pcm_s16le',
+                                        'sample_rate': sample_rate, 'channels': 1}, request_id), None
+                    yield self.tag({'event': 'audio', 'index': index, 'bytes': len(audio)}, request_id), audio
+                    index += 1
+                    samples += len(audio) // 2
+            finally:
+                # Client went away: stop synthesizing the rest of the story
+                cancelled.set()
+            if index == 0:
+                # e.g. punctuation-only text: never end a stream that has no start
+                raise ValueError("Text contains nothing to synthesize")
+            self.requests_served += 1
+
+            yield self.tag({'event': 'end', 'success': True, 'chunks': index,
+                            'duration': round(samples / sample_rate, 3)}, request_id), None
+
+        except Exception as e:
+            print(f"❌ Streaming synthesis failed: {e}", file=sys.stderr)
+            yield self.tag({'event': 'error', 'success': False, 'error': str(e),
+                            'error_type': type(e).__name__}, request_id), None
+
+    def produce(self, text, language, chunks, cancelled):
+        """
+        Put each synthesized (sample_rate, audio) on the chunks queue, then
+        None. The queue is unbounded, at most one story of PCM, so synthesis
+        never waits for the client and releases the lock as soon as it is done.
+        """
+        try:
+            with self.lock:
+                with closing(self.service.stream_speech(text, language)) as speech:
+                    for chunk in speech:
+                        if cancelled.is_set():
+                            break
+                        chunks.put(chunk)
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            chunks.put(None)
+
+    @staticmethod
+    def tag(event, request_id):
+        if request_id is not None:
+            event['id'] = request_id
+        return event
+
+class NDJSONHandler(socketserver.StreamRequestHandler):
+    """
+    One JSON request per line in, one JSON response per line out, in order.
+    Requests with "stream": true get framed audio instead: JSON event lines,
+    each audio event followed by exactly its "bytes" of raw PCM.
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                request = None
+                response = {'success': False, 'error': f"Invalid JSON input: {e}", 'error_type': 'ValueError'}
+
+            try:
+                if isinstance(request, dict) and request.get('stream'):
+                    with closing(self.server.tts.stream(request)) as events:
+                        for event, audio in events:
+                            self.wfile.write(json.dumps(event).encode('utf-8') + b'\n')
+                            if audio:
+                                self.wfile.write(audio)
+                            self.wfile.flush()
+                    continue
+
+                if request is not None:
+                    response = self.server.tts.handle(request)
+                self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+class UnixNDJSONServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class HTTPHandler(BaseHTTPRequestHandler):
+    """POST /synthesize, POST /synthesize/stream and GET /health on a local port"""
+
+    # Chunked transfer encoding for streams needs HTTP/1.1
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.rstrip('/') in ('/health', '/ready'):
+            status = self.server.tts.health()
+            self.send_json(200 if status['ready'] else 503, status)
+        else:
+            self.send_json(404, {'success': False, 'error': 'Not found'})
+
+    def do_POST(self):
+        path = self.path.rstrip('/')
+        if path not in ('/synthesize', '/synthesize/stream'):
+            self.send_json(404, {'success': False, 'error': 'Not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'null')
+        except (ValueError, json.JSONDecodeError) as e:
+            self.send_json(400, {'success': False, 'error': f"Invalid JSON input: {e}", 'error_type': 'ValueError'})
+            return
+
+        if path == '/synthesize/stream' and isinstance(request, dict):
+            self.send_stream(request)
+            return
+
+        result = self.server.tts.handle(request)
+        self.send_json(200 if result['success'] else self.error_status(result), result)
+
+    def send_stream(self, request):
+        """
+        Chunked audio/wav: a header with an open-ended length, then PCM for
+        each sentence as soon as it is synthesized
+        """
+        started = False
+        with closing(self.server.tts.stream(request)) as events:
+            for event, audio in events:
+                if event['event'] == 'start':
+                    started = True
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'audio/wav')
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    self.end_headers()
+                    self.write_chunk(wav_stream_header(event['sample_rate']))
+                elif event['event'] == 'audio':
+                    self.write_chunk(audio)
+                elif event['event'] == 'end':
+                    self.wfile.write(b'0\r\n\r\n')
+                elif event['event'] == 'error':
+                    if not started:
+                        self.send_json(self.error_status(event), event)
+                    else:
+                        # Status already sent: end without the final chunk so the client sees a truncated body
+                        self.close_connection = True
+                    return
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    @staticmethod
+    def error_status(result):
+        if result.get('error_type') == 'ValueError':
+            return 400
+        if result.get('error_type') == 'TimeoutError':
+            return 503
+        return 500
+
+    def send_json(self, code, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        print(f"🔊 {self.address_string()} {format % args}", file=sys.stderr)
+
+def serve_unix(tts, path):
+    if os.path.exists(path):
+        os.unlink(path)
+    server = UnixNDJSONServer(path, NDJSONHandler)
+    server.tts = tts
+    print(f"🔊 TTS server listening on unix:{path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+def serve_http(tts, address):
+    host, _, port = address.rpartition(':')
+    server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), HTTPHandler)
+    server.daemon_threads = True
+    server.tts = tts
+    print(f"🔊 TTS server listening on http://{host or '127.0.0.1'}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+def main():
+    """Server entry point"""
+    parser = argparse.ArgumentParser(description='Persistent TTS server')
+    parser.add_argument('--backend', default=os.environ.get('TTS_BACKEND', 'professional'), choices=list(BACKENDS))
+    parser.add_argument('--socket', default=os.environ.get('TTS_SOCKET'), help='Unix socket path for NDJSON requests')
+    parser.add_argument('--http', default=os.environ.get('TTS_HTTP'), help='host:port for local HTTP')
+    parser.add_argument('--ready-timeout', type=float, default=float(os.environ.get('TTS_READY_TIMEOUT', 120)))
+    args = parser.parse_args()
+
+    if not args.socket and not args.http:
+        args.socket = '/tmp/barakah-tts.sock'
+
+    # Unwind on SIGTERM too, so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    tts = TTSServer(args.backend, args.ready_timeout)
+    tts.start_loading()
+
+    try:
+        if args.socket and args.http:
+            threading.Thread(target=serve_http, args=(tts, args.http), name='tts-http', daemon=True).start()
+        if args.socket:
+            serve_unix(tts, args.socket)
+        else:
+            serve_http(tts, args.http)
+    except KeyboardInterrupt:
+        print("🛑 TTS server stopped", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -6,23 +6,227 @@ High-quality neural voice synthesis with multi-language support
 
 import sys
 import json
-import base64
 import io
-import tempfile
 import os
+import gc
+import time
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 import torch
 from TTS.api import TTS
 import soundfile as sf
 import numpy as np
+from tts_cache import audio_cache, speech_result
+from tts_codecs import data_uri, encode, resolve_encoding
+from tts_text import MAX_CHUNK_CHARS, PAUSE_AFTER_CLAUSE, PAUSE_AFTER_SENTENCE, split_text
+
+DEFAULT_MODEL = 'tts_models/en/ljspeech/tacotron2-DDC_ph'
+
+# Bump when post-processing or stitching changes, so cached audio is re-synthesized
+AUDIO_PIPELINE_VERSION = 1
+
+# Short phrase run through each freshly loaded model so the first real
+# request doesn't pay for lazy initialisation (phonemizer, kernels)
+WARMUP_TEXT = 'Bismillah. Alhamdulillah.'
+
+# Longest preload waits for the chunk worker pool to load its models
+POOL_START_TIMEOUT = float(os.environ.get('TTS_POOL_START_TIMEOUT', 600))
+
+def model_size_bytes(tts_model):
+    """Resident size of a loaded model: its parameters and buffers"""
+    synthesizer = getattr(tts_model, 'synthesizer', None)
+    modules = [value for value in vars(synthesizer).values() if isinstance(value, torch.nn.Module)] if synthesizer else []
+    seen = set()
+    total = 0
+    for module in modules:
+        for tensor in list(module.parameters()) + list(module.buffers()):
+            if tensor.data_ptr() not in seen:
+                seen.add(tensor.data_ptr())
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+def trim_silence(audio_data, threshold=0.01):
+    """View of a waveform without its leading and trailing near-silence"""
+    peak = max(float(audio_data.max(initial=0.0)), -float(audio_data.min(initial=0.0)))
+    if peak == 0:
+        return audio_data[:0]
+    loud = np.flatnonzero(np.abs(audio_data) > peak * threshold)
+    return audio_data[loud[0]:loud[-1] + 1]
+
+def speech_rms(audio_data, gate=0.05):
+    """RMS over the samples louder than a gate, so pauses don't lower it"""
+    peak = max(float(audio_data.max(initial=0.0)), -float(audio_data.min(initial=0.0)))
+    if peak == 0:
+        return 0.0
+    active = audio_data[np.abs(audio_data) > peak * gate]
+    return float(np.sqrt(np.mean(np.square(active, dtype=np.float64))))
+
+def loudness_gain(level, target):
+    """Gain bringing a chunk's speech RMS to the target, limited so a near-silent chunk isn't blown up into noise"""
+    return min(max(target / level, 0.25), 4.0) if level > 0 else 1.0
+
+def pcm16(audio_data):
+    """Little-endian 16-bit PCM bytes of a waveform in [-1, 1]"""
+    return (audio_data * 32767).astype('<i2').tobytes()
+
+def stitch_chunks(waveforms, pauses, sample_rate):
+    """
+    Join chunk waveforms with the given pauses (seconds) of silence between
+    them, scaling each chunk to the median speech loudness of the set.
+    """
+    waveforms = [trim_silence(audio_data) for audio_data in waveforms]
+    levels = [speech_rms(audio_data) for audio_data in waveforms]
+    voiced = [level for level in levels if level > 0]
+    target = float(np.median(voiced)) if voiced else 0.0
+
+    gaps = [int(round(pause * sample_rate)) for pause in pauses]
+    stitched = np.zeros(sum(len(audio_data) for audio_data in waveforms) + sum(gaps), dtype=np.float32)
+
+    position = 0
+    for audio_data, level, gap in zip(waveforms, levels, gaps):
+        np.multiply(audio_data, loudness_gain(level, target), out=stitched[position:position + len(audio_data)])
+        position += len(audio_data) + gap
+    return stitched
+
+# Per-process service for the long-form worker pool
+_worker_service = None
+
+def _init_chunk_worker(threads, languages, warm_up, memory_budget_mb, barrier):
+    global _worker_service
+    torch.set_num_threads(threads)
+    _worker_service = ProfessionalTTSService(workers=1, memory_budget_mb=memory_budget_mb)
+    _worker_service.preload(languages, warm_up)
+    try:
+        # The parent waits here too, so it reports ready only once every worker is warm
+        barrier.wait(timeout=POOL_START_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass
+
+def _chunk_worker_resident_bytes():
+    return _worker_service.models.total_bytes()
+
+def _synthesize_chunk(text, language):
+    return _worker_service.raw_waveform(text, language)
+
+class ModelRegistry:
+    def __init__(self, device, memory_budget_mb=None):
+        """
+        Loaded Coqui models by name, least recently used first. Models past
+        the memory budget are unloaded (never the one just requested).
+        """
+        self.device = device
+        if memory_budget_mb is None:
+            memory_budget_mb = float(os.environ.get('TTS_MODEL_MEMORY_MB', 2048))
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+        self.load_locks = {}
+        self.evictions = 0
+
+    def __contains__(self, model_name):
+        return model_name in self.entries
+
+    def __iter__(self):
+        return iter(list(self.entries))
+
+    def get(self, model_name):
+        """Return a loaded model, loading it (once, even under concurrency) if needed"""
+        with self.lock:
+            entry = self.entries.get(model_name)
+            if entry is not None:
+                self.entries.move_to_end(model_name)
+                entry['hits'] += 1
+                entry['last_used'] = time.time()
+                return entry['model']
+            load_lock = self.load_locks.setdefault(model_name, threading.Lock())
+
+        with load_lock:
+            with self.lock:
+                if model_name in self.entries:
+                    return self.get(model_name)
+
+            start = time.monotonic()
+            model = TTS(model_name=model_name, progress_bar=False).to(self.device)
+            entry = {
+                'model': model,
+                'bytes': model_size_bytes(model),
+                'load_seconds': round(time.monotonic() - start, 3),
+                'warmup_seconds': None,
+                'loaded_at': time.time(),
+                'last_used': time.time(),
+                'hits': 1
+            }
+
+            with self.lock:
+                self.entries[model_name] = entry
+                self.load_locks.pop(model_name, None)
+                self.evict(keep=model_name)
+            return model
+
+    def warm_up(self, model_name):
+        """Run one short inference so lazy initialisation happens now"""
+        model = self.get(model_name)
+        start = time.monotonic()
+        model.tts(text=WARMUP_TEXT)
+        with self.lock:
+            if model_name in self.entries:
+                self.entries[model_name]['warmup_seconds'] = round(time.monotonic() - start, 3)
+
+    def evict(self, keep=None):
+        """Unload least recently used models until within the memory budget"""
+        with self.lock:
+            evicted = []
+            for model_name in list(self.entries):
+                if self.total_bytes() <= self.memory_budget:
+                    break
+                if model_name == keep:
+                    continue
+                del self.entries[model_name]
+                evicted.append(model_name)
+
+        if evicted:
+            self.evictions += len(evicted)
+            gc.collect()
+            if self.device == 'cuda':
+                torch.cuda.empty_cache()
+            print(f"♻️ Unloaded TTS models over budget: {', '.join(evicted)}", file=sys.stderr)
+        return evicted
+
+    def total_bytes(self):
+        return sum(entry['bytes'] for entry in self.entries.values())
+
+    def metrics(self):
+        """Load time, warm-up time, resident size and use counts per loaded model"""
+        with self.lock:
+            return {
+                'memory_budget_bytes': self.memory_budget,
+                'resident_bytes': self.total_bytes(),
+                'evictions': self.evictions,
+                'models': {
+                    model_name: {key: value for key, value in entry.items() if key != 'model'}
+                    for model_name, entry in self.entries.items()
+                }
+            }
 
 class ProfessionalTTSService:
-    def __init__(self):
-        self.models = {}
+    def __init__(self, workers=None, memory_budget_mb=None):
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.models = ModelRegistry(self.device, memory_budget_mb)
+        # Long-form chunks are synthesized across up to this many processes,
+        # each with its own model copy (Tacotron decoders keep per-call state).
+        # The pool is started by preload(); without it chunks run in-process.
+        if workers is None:
+            workers = int(os.environ.get('TTS_WORKERS', min(4, os.cpu_count() or 1)))
+        self.workers = workers
+        self.pool = None
+        self.pool_info = None
         print(f"🔊 TTS Service initialized on {self.device}", file=sys.stderr)
         
-    def get_model_for_language(self, language):
+    def model_name_for_language(self, language):
         """Get the best professional model for each language"""
         language_models = {
             'english': 'tts_models/en/ljspeech/tacotron2-DDC_ph',
@@ -37,31 +241,116 @@ class ProfessionalTTSService:
             'italian': 'tts_models/it/mai_female/glow-tts'
         }
         
-        model_name = language_models.get(language.lower(), language_models['english'])
+        return language_models.get(language.lower(), language_models['english'])
+    
+    def get_model_for_language(self, language):
+        """Loaded model for a language, falling back to English if it can't be loaded"""
+        model_name = self.model_name_for_language(language)
+        
+        try:
+            if model_name in self.models:
+                return self.models.get(model_name)
+            print(f"📥 Loading {model_name} for {language}...", file=sys.stderr)
+            model = self.models.get(model_name)
+            print(f"✅ Model {model_name} loaded successfully", file=sys.stderr)
+        except Exception as e:
+            print(f"❌ Failed to load {model_name}: {e}", file=sys.stderr)
+            # Fallback to default English model
+            model_name = DEFAULT_MODEL
+            model = self.models.get(model_name)
+        
+        return model
+    
+    def preload(self, languages=None, warm_up=None):
+        """
+        Load (and by default warm up) the models for hot languages, e.g. at
+        server start. Defaults come from TTS_PRELOAD_LANGUAGES and TTS_WARMUP.
+        """
+        if languages is None:
+            languages = [language.strip() for language in
+                         os.environ.get('TTS_PRELOAD_LANGUAGES', 'english,arabic').split(',') if language.strip()]
+        if warm_up is None:
+            warm_up = os.environ.get('TTS_WARMUP', 'true').lower() not in ('0', 'false', 'no')
         
-        # Load model if not already loaded
-        if model_name not in self.models:
+        for model_name in dict.fromkeys(self.model_name_for_language(language) for language in languages):
             try:
-                print(f"📥 Loading {model_name} for {language}...", file=sys.stderr)
-                self.models[model_name] = TTS(model_name=model_name, progress_bar=False).to(self.device)
-                print(f"✅ Model {model_name} loaded successfully", file=sys.stderr)
+                print(f"📥 Preloading {model_name}...", file=sys.stderr)
+                self.models.get(model_name)
+                if warm_up:
+                    self.models.warm_up(model_name)
+                print(f"✅ Model {model_name} ready", file=sys.stderr)
             except Exception as e:
-                print(f"❌ Failed to load {model_name}: {e}", file=sys.stderr)
-                # Fallback to default English model
-                if 'tts_models/en/ljspeech/tacotron2-DDC_ph' not in self.models:
-                    self.models['tts_models/en/ljspeech/tacotron2-DDC_ph'] = TTS(
-                        model_name='tts_models/en/ljspeech/tacotron2-DDC_ph', 
-                        progress_bar=False
-                    ).to(self.device)
-                model_name = 'tts_models/en/ljspeech/tacotron2-DDC_ph'
-        
-        return self.models[model_name]
+                print(f"❌ Failed to preload {model_name}: {e}", file=sys.stderr)
+        
+        if self.workers > 1 and self.pool is None:
+            self.start_pool(languages, warm_up)
+    
+    def start_pool(self, languages, warm_up):
+        """
+        Start the long-form worker pool and wait until every worker has loaded
+        (and warmed) the same models. The copies share the TTS_MODEL_MEMORY_MB
+        budget with this process, so the pool is shrunk to what fits; below
+        two workers, chunks are synthesized in-process instead.
+        """
+        resident = self.models.total_bytes()
+        workers = self.workers
+        if resident:
+            workers = min(workers, self.models.memory_budget // resident - 1)
+        if workers <= 1:
+            print("⚠️ No room for a TTS worker pool in the memory budget, synthesizing chunks in-process", file=sys.stderr)
+            return
+        
+        # Every process, this one included, gets an equal share of the budget
+        share = self.models.memory_budget // (workers + 1)
+        self.models.memory_budget = share
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(workers + 1)
+        
+        print(f"📥 Starting {workers} TTS worker processes...", file=sys.stderr)
+        start = time.monotonic()
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            # spawn, not fork: forking after torch has started its threads can deadlock
+            mp_context=context,
+            initializer=_init_chunk_worker,
+            initargs=(threads, languages, warm_up, share / (1024 * 1024), barrier)
+        )
+        # One task per worker, so all of them are spawned now rather than on demand
+        futures = [pool.submit(_chunk_worker_resident_bytes) for _ in range(workers)]
+        try:
+            barrier.wait(timeout=POOL_START_TIMEOUT)
+            worker_bytes = [future.result(timeout=POOL_START_TIMEOUT) for future in futures]
+        except (threading.BrokenBarrierError, BrokenProcessPool, TimeoutError) as e:
+            barrier.abort()
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.models.memory_budget = share * (workers + 1)
+            print(f"❌ TTS worker pool failed to start ({type(e).__name__}), synthesizing chunks in-process", file=sys.stderr)
+            return
+        
+        self.pool = pool
+        self.pool_info = {
+            'workers': workers,
+            'start_seconds': round(time.monotonic() - start, 3),
+            'memory_budget_bytes_per_process': share,
+            # Every worker loaded the same models
+            'worker_resident_bytes': max(worker_bytes) * workers
+        }
+        print(f"✅ {workers} TTS worker processes ready", file=sys.stderr)
+    
+    def stop_pool(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+            self.models.memory_budget = self.models.memory_budget * (self.pool_info['workers'] + 1)
+    
+    def model_metrics(self):
+        metrics = self.models.metrics()
+        metrics['pool'] = dict(self.pool_info, running=self.pool is not None) if self.pool_info else None
+        return metrics
     
     def preprocess_islamic_text(self, text):
         """Professional preprocessing for Islamic content"""
-        # Limit text length for better quality
-        text = text[:1000]
-        
         # Add natural pauses for better narration
         text = text.replace('.', '. ')
         text = text.replace(',', ', ')
@@ -91,65 +380,169 @@ class ProfessionalTTSService:
         return text
     
     def post_process_audio(self, audio_data, sample_rate=22050):
-        """Professional audio post-processing for children's content"""
-        # Normalize audio
-        audio_data = audio_data / np.max(np.abs(audio_data))
+        """
+        Professional audio post-processing for children's content.
+        Works in place on a float32 array, so no full-length copies are made.
+        """
+        # Normalize audio (peak without the temporary np.abs() would allocate)
+        peak = max(float(audio_data.max(initial=0.0)), -float(audio_data.min(initial=0.0)))
         
         # Apply gentle compression for consistent volume
-        audio_data = np.tanh(audio_data * 0.8)
+        if peak > 0:
+            audio_data *= 0.8 / peak
+        np.tanh(audio_data, out=audio_data)
         
         # Slight pitch adjustment for more pleasant sound
         # This is a simplified approach - for production you might want more sophisticated processing
         
         return audio_data
     
-    def synthesize_speech(self, text, language='english'):
-        """Generate professional speech synthesis"""
+    def raw_waveform(self, text, language='english'):
+        """Model output for processed text as a float32 waveform and its sample rate"""
+        tts_model = self.get_model_for_language(language)
+        
+        # In-memory inference: tts() returns the samples, no WAV file round-trip
+        audio_data = np.asarray(tts_model.tts(text=text), dtype=np.float32)
+        sample_rate = getattr(getattr(tts_model, 'synthesizer', None), 'output_sample_rate', None) or 22050
+        
+        return audio_data, sample_rate
+    
+    def synthesize_waveform(self, text, language='english'):
+        """
+        Synthesize processed text of any length to a post-processed float32
+        waveform. Text is split at sentence/clause boundaries; several chunks
+        are synthesized in parallel and stitched with pauses.
+        """
+        chunks = split_text(text)
+        if len(chunks) <= 1:
+            audio_data, sample_rate = self.raw_waveform(text, language)
+            return self.post_process_audio(audio_data, sample_rate), sample_rate
+        
+        texts = [chunk for chunk, _ in chunks]
+        if self.pool is not None:
+            try:
+                results = list(self.pool.map(_synthesize_chunk, texts, [language] * len(texts)))
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); later requests run in-process
+                print("❌ TTS worker pool broke, synthesizing chunks in-process", file=sys.stderr)
+                self.stop_pool()
+                raise
+        else:
+            results = [self.raw_waveform(chunk, language) for chunk in texts]
+        
+        sample_rate = results[0][1]
+        audio_data = stitch_chunks([waveform for waveform, _ in results], [pause for _, pause in chunks], sample_rate)
+        print(f"🧩 Stitched {len(chunks)} chunks", file=sys.stderr)
+        
+        return self.post_process_audio(audio_data, sample_rate), sample_rate
+    
+    def stream_waveforms(self, text, language='english'):
+        """
+        Yield one post-processed float32 waveform (trailing pause included)
+        per chunk of processed text, in order, each as soon as it is ready.
+        Loudness is matched to the first chunk, since later ones don't exist yet.
+        """
+        chunks = split_text(text)
+        futures = []
+        if self.pool is not None and len(chunks) > 1:
+            futures = [self.pool.submit(_synthesize_chunk, chunk, language) for chunk, _ in chunks]
+            results = (future.result() for future in futures)
+        else:
+            results = (self.raw_waveform(chunk, language) for chunk, _ in chunks)
+        
+        try:
+            target = scale = None
+            for (audio_data, sample_rate), (_, pause) in zip(results, chunks):
+                audio_data = trim_silence(audio_data)
+                level = speech_rms(audio_data)
+                if target is None:
+                    # Same normalisation as post_process_audio, fixed by the first chunk
+                    target = level
+                    peak = max(float(audio_data.max(initial=0.0)), -float(audio_data.min(initial=0.0)))
+                    scale = 0.8 / peak if peak > 0 else 1.0
+                
+                waveform = np.zeros(len(audio_data) + int(round(pause * sample_rate)), dtype=np.float32)
+                np.multiply(audio_data, loudness_gain(level, target) * scale, out=waveform[:len(audio_data)])
+                np.tanh(waveform, out=waveform)
+                yield waveform, sample_rate
+        except BrokenProcessPool:
+            print("❌ TTS worker pool broke, synthesizing chunks in-process", file=sys.stderr)
+            self.stop_pool()
+            raise
+        finally:
+            # Client went away: don't keep rendering the rest of the story
+            for future in futures:
+                future.cancel()
+    
+    def stream_speech(self, text, language='english'):
+        """Preprocess and synthesize sentence by sentence, yielding (sample_rate, 16-bit PCM bytes)"""
+        processed_text = self.preprocess_islamic_text(text)
+        print(f"🔊 Streaming speech for: {processed_text[:50]}...", file=sys.stderr)
+        
+        for waveform, sample_rate in self.stream_waveforms(processed_text, language):
+            yield sample_rate, pcm16(waveform)
+    
+    def cache_key(self, processed_text, language, audio_format='wav', bitrate=None):
+        """Audio cache key: everything that shapes the output besides the text"""
+        return audio_cache.key(
+            processed_text, language.lower(), self.model_name_for_language(language),
+            {'pipeline': AUDIO_PIPELINE_VERSION, 'chunk_chars': MAX_CHUNK_CHARS,
+             'pauses': [PAUSE_AFTER_SENTENCE, PAUSE_AFTER_CLAUSE], 'bitrate': bitrate},
+            audio_format
+        )
+    
+    def cached_speech(self, text, language='english', audio_format='wav', bitrate=None):
+        """Data URI of already-synthesized audio for this text, or None"""
+        audio_format, bitrate = resolve_encoding(audio_format, bitrate)
+        key = self.cache_key(self.preprocess_islamic_text(text), language, audio_format, bitrate)
+        return audio_cache.get_data_uri(key, audio_format)
+    
+    def synthesize_speech(self, text, language='english', audio_format='wav', bitrate=None):
+        """Generate professional speech synthesis as a WAV, Opus, MP3 or Ogg data URI"""
         try:
+            audio_format, bitrate = resolve_encoding(audio_format, bitrate)
+            
             # Preprocess text for Islamic content
             processed_text = self.preprocess_islamic_text(text)
-            print(f"🔊 Generating speech for: {processed_text[:50]}...", file=sys.stderr)
             
-            # Get appropriate model
-            tts_model = self.get_model_for_language(language)
+            # Repeat narrations come straight from the audio cache
+            key = self.cache_key(processed_text, language, audio_format, bitrate)
+            cached = audio_cache.get_data_uri(key, audio_format)
+            if cached is not None:
+                print(f"⚡ Cached speech for: {processed_text[:50]}...", file=sys.stderr)
+                return cached
+            
+            print(f"🔊 Generating speech for: {processed_text[:50]}...", file=sys.stderr)
             
-            # Generate audio with temporary file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-                tmp_path = tmp_file.name
+            audio_data, sample_rate = self.synthesize_waveform(processed_text, language)
             
-            try:
-                # Generate speech
-                tts_model.tts_to_file(
-                    text=processed_text,
-                    file_path=tmp_path
-                )
-                
-                # Load and process audio
-                audio_data, sample_rate = sf.read(tmp_path)
-                
-                # Post-process for professional quality
-                audio_data = self.post_process_audio(audio_data, sample_rate)
-                
-                # Convert to MP3-compatible format
+            if audio_format == 'wav':
+                # Encode once to 16-bit WAV
                 audio_buffer = io.BytesIO()
-                sf.write(audio_buffer, audio_data, sample_rate, format='WAV')
-                audio_buffer.seek(0)
-                
-                # Convert to base64
-                audio_base64 = base64.b64encode(audio_buffer.getvalue()).decode('utf-8')
-                
-                print("✅ Speech synthesis completed successfully", file=sys.stderr)
-                return f"data:audio/wav;base64,{audio_base64}"
-                
-            finally:
-                # Clean up temporary file
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
+                sf.write(audio_buffer, audio_data, sample_rate, format='WAV', subtype='PCM_16')
+                audio_bytes = audio_buffer.getbuffer()
+            else:
+                # Compressed formats are encoded from raw PCM, no intermediate WAV
+                audio_bytes = encode(pcm16(audio_data), audio_format, bitrate, sample_rate)
+            audio_cache.put(key, audio_bytes, audio_format)
+            
+            print(f"✅ Speech synthesis completed successfully ({audio_format}, {len(audio_bytes)} bytes)", file=sys.stderr)
+            return data_uri(audio_bytes, audio_format)
                     
         except Exception as e:
             print(f"❌ Speech synthesis failed: {e}", file=sys.stderr)
             raise e
 
+def handle_request(tts_service, request):
+    """Validate one JSON request and synthesize it with a ready service"""
+    return speech_result(tts_service.synthesize_speech, request)
+
+def cached_result(tts_service, request):
+    """handle_request's result when the audio is already cached, else None (never synthesizes)"""
+    if 'text' not in request:
+        return None
+    return speech_result(tts_service.cached_speech, request)
+
 def main():
     """Main service entry point"""
     try:
@@ -165,26 +558,10 @@ def main():
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON input: {e}")
         
-        # Validate required fields
-        if 'text' not in request:
-            raise ValueError("Missing 'text' field in request")
-        
-        text = request['text']
-        language = request.get('language', 'english')
-        
         # Initialize TTS service
         tts_service = ProfessionalTTSService()
         
-        # Generate speech
-        audio_data = tts_service.synthesize_speech(text, language)
-        
-        # Return result
-        result = {
-            'success': True,
-            'audio_data': audio_data,
-            'language': language,
-            'text_length': len(text)
-        }
+        result = handle_request(tts_service, request)
         
         print(json.dumps(result))
         
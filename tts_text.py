@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Text Chunking for Long-Form TTS
+Splits narration at sentence and clause boundaries so stories of any length
+can be synthesized chunk by chunk instead of being truncated
+"""
+
+import os
+import re
+
+# Seconds of silence after each kind of boundary, matching the
+# pause_after_sentences / pause_after_commas hints given to the browser
+PAUSE_AFTER_SENTENCE = 0.5
+PAUSE_AFTER_CLAUSE = 0.3
+
+# Tacotron-style models lose alignment on long inputs; keep chunks well below that
+MAX_CHUNK_CHARS = int(os.environ.get('TTS_CHUNK_CHARS', 250))
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?؟])\s+')
+CLAUSE_BOUNDARY = re.compile(r'(?<=[,;:،؛])\s+')
+
+def pack(parts, max_chars):
+    """Greedily join consecutive parts with spaces while they fit in max_chars"""
+    packed = []
+    for part in parts:
+        if packed and len(packed[-1]) + 1 + len(part) <= max_chars:
+            packed[-1] = f"{packed[-1]} {part}"
+        else:
+            packed.append(part)
+    return packed
+
+def split_text(text, max_chars=MAX_CHUNK_CHARS):
+    """
+    Split text into [(chunk, pause_after_seconds)]: one chunk per sentence,
+    long sentences split at clauses and then at word boundaries. The last
+    chunk has no pause after it.
+    """
+    chunks = []
+    for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            chunks.append((sentence, PAUSE_AFTER_SENTENCE))
+            continue
+
+        pieces = []
+        for clause in pack(CLAUSE_BOUNDARY.split(sentence), max_chars):
+            if len(clause) <= max_chars:
+                pieces.append((clause, PAUSE_AFTER_CLAUSE))
+            else:
+                # No usable punctuation: split between words without a pause
+                pieces.extend((words, 0.0) for words in pack(clause.split(), max_chars))
+                pieces[-1] = (pieces[-1][0], PAUSE_AFTER_CLAUSE)
+        pieces[-1] = (pieces[-1][0], PAUSE_AFTER_SENTENCE)
+        chunks.extend(pieces)
+
+    if chunks:
+        chunks[-1] = (chunks[-1][0], 0.0)
+    return chunks